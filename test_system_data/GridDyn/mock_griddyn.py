@@ -8,7 +8,7 @@ logger.addHandler(logging.StreamHandler())
 logger.setLevel(logging.DEBUG)
 
 
-def create_federate(deltat=1.0, fedinitstring="--federates=1"):
+def create_federate(deltat=1.0, fedinitstring="--federates=1", realtime=False):
 
     fedinfo = h.helicsFederateInfoCreate()
 
@@ -27,6 +27,10 @@ def create_federate(deltat=1.0, fedinitstring="--federates=1"):
     status = h.helicsFederateInfoSetLoggingLevel(fedinfo, 1)
     assert status == 0
 
+    # Real time (pacing 1) is paced by HELICS itself
+    status = h.helicsFederateInfoSetFlag(fedinfo, h.helics_flag_realtime, realtime)
+    assert status == 0
+
     fed = h.helicsCreateCombinationFederate(fedinfo)
 
     return fed
@@ -42,9 +46,17 @@ def destroy_federate(fed):
     h.helicsCloseLibrary()
 
 
-def main():
+def wait_for_wall_clock(start, grantedtime, pacing):
+    # Scaled pacing; see wait_for_wall_clock() in
+    #   tutorials/1-DistributionFederation-ManualStart/federate1.py
+    delay = start + grantedtime / pacing - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
 
-    fed = create_federate()
+
+def main(pacing=None):
+    realtime = pacing == 1
+    fed = create_federate(realtime=realtime)
 
     pubid1 = h.helicsFederateRegisterGlobalTypePublication (fed, "GenOutput/Alta", h.HELICS_DATA_TYPE_COMPLEX, "")
     pubid2 = h.helicsFederateRegisterGlobalTypePublication (fed, "GenOutput/Brighton", h.HELICS_DATA_TYPE_COMPLEX, "")
@@ -71,6 +83,7 @@ def main():
     subid16 = h.helicsFederateRegisterSubscription(fed, "MarketSim/AGCGenDispatch/Sundance", "double", "")
 
     h.helicsFederateEnterExecutionMode(fed)
+    start = time.monotonic()
 
     hours = 1
     seconds = int(60 * 60 * hours)
@@ -95,7 +108,8 @@ def main():
         # status = h.helicsEndpointSendEventRaw(epid, "fixed_price", 10, t)
         while grantedtime < t:
             status, grantedtime = h.helicsFederateRequestTime (fed, t)
-        time.sleep(1)
+        if pacing is not None and not realtime:
+            wait_for_wall_clock(start, grantedtime, pacing)
         logger.info("Python Federate grantedtime = {}".format(grantedtime))
 
     t = 60 * 60 * 24
@@ -106,8 +120,14 @@ def main():
 
 
 if __name__ == "__main__":
-
-    main()
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pacing", type=float,
+                        help="simulated seconds per wall-clock second; 1 is real time "
+                             "(default: as fast as possible)")
+
+    args = parser.parse_args()
+    main(pacing=args.pacing)
     logger.info("Done!")
 
 
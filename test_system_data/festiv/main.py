@@ -1,6 +1,9 @@
 import sys
+import copy
+import glob
 import logging
 import os
+import pickle
 import pandas as pd
 import time
 import helics as h
@@ -13,9 +16,54 @@ current_directory = os.path.realpath(os.path.dirname(__file__))
 
 filename = os.path.join(current_directory, 'Input', 'PJM_5BUS.xlsx')
 timeseries = os.path.join(current_directory, 'Input', 'TIMESERIES')
+cache_directory = os.path.join(current_directory, 'Input', '.cache')
 
 logger = logging.getLogger('psst.festiv')
 
+_memory_cache = {}
+
+
+def cached(path, parse, tag):
+    """Return parse(path), parsing each input file at most once.
+
+    The parsed result is kept in memory and also pickled to the cache
+    directory, keyed by the file's modification time, so later runs skip
+    the Excel parsing too. Changing the file invalidates the cache.
+    """
+    mtime = os.path.getmtime(path)
+    key = (path, tag)
+    if key in _memory_cache and _memory_cache[key][0] == mtime:
+        return _memory_cache[key][1]
+
+    prefix = os.path.join(cache_directory, '{}.{}'.format(os.path.basename(path), tag))
+    cache_file = '{}.{}.pkl'.format(prefix, int(mtime * 1e6))
+    if os.path.exists(cache_file):
+        logger.debug("Loading cached {} from {}".format(path, cache_file))
+        with open(cache_file, 'rb') as f:
+            value = pickle.load(f)
+    else:
+        logger.debug("Parsing {}".format(path))
+        value = parse(path)
+        os.makedirs(cache_directory, exist_ok=True)
+        for stale in glob.glob('{}.*.pkl'.format(prefix)):
+            os.remove(stale)
+        tmp_file = '{}.{}.tmp'.format(cache_file, os.getpid())
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+
+    _memory_cache[key] = (mtime, value)
+    return value
+
+
+def get_case():
+    # Every model modifies its case, so hand out a copy of the cached one
+    return copy.deepcopy(cached(filename, read_festiv, 'case'))
+
+
+def get_load_dist():
+    return cached(filename, lambda f: pd.read_excel(f, sheet_name='LOAD_DIST', index_col=0,), 'load_dist')
+
 
 
 def create_broker():
@@ -83,13 +131,13 @@ def create_mapping():
 
 def build_DAM_model(day, s):
 
-    mpc = read_festiv(filename)
+    mpc = get_case()
     mpc.gen['RAMP_10'] = mpc.gen['PMAX']
 
     for i in range(0, len(s.index)):
         mpc.load.loc[i] = mpc.load.loc[0]
 
-    for b, v in pd.read_excel(filename, sheet_name='LOAD_DIST', index_col=0,).iterrows():
+    for b, v in get_load_dist().iterrows():
         mpc.load.loc[:, b] = v.values[0] * s.values
 
     m = build_model(mpc)
@@ -99,10 +147,10 @@ def build_DAM_model(day, s):
 
 def build_RTM_model(day, load, commitment):
 
-    mpc = read_festiv(filename)
+    mpc = get_case()
     mpc.gen['RAMP_10'] = mpc.gen['PMAX']
 
-    for b, v in pd.read_excel(filename, sheet_name='LOAD_DIST', index_col=0,).iterrows():
+    for b, v in get_load_dist().iterrows():
         mpc.load.loc[:, b] = v.values[0] * load
 
     for col in mpc.gen['GEN_STATUS'].index:
@@ -118,10 +166,35 @@ def build_RTM_model(day, load, commitment):
     return m
 
 
+def update_RTM_model(m, load, commitment):
+    """Update an RTM model from build_RTM_model in place for a new interval.
+
+    Only the bus loads and the unit commitment change from one interval to
+    the next, so rather than rebuilding the whole Pyomo model the (mutable)
+    Demand parameters are set and the UnitOn variables re-fixed the same
+    way build_model does it from gen_status.
+    """
+    model = m._model
+    load_dist = get_load_dist()
+
+    status = {g: 0 for g in model.Generators if g != 'GenCo0'}
+    status.update(commitment.iloc[0].to_dict())
+
+    for t in model.TimePeriods:
+        for b, v in load_dist.iterrows():
+            model.Demand[b, t] = v.values[0] * load
+        for g, v in status.items():
+            if not pd.isnull(v):
+                model.UnitOn[g, t].fix(int(float(v)))
+
+    return m
+
+
 def get_load(day):
     d = int(day.split('-')[-1]) - 2
 
-    df = pd.read_excel(os.path.join(timeseries, 'ACTUAL_LOAD_DAY_{day}.xlsx'.format(day=d)), index_col=0, parse_dates=True)
+    df = cached(os.path.join(timeseries, 'ACTUAL_LOAD_DAY_{day}.xlsx'.format(day=d)),
+                lambda f: pd.read_excel(f, index_col=0, parse_dates=True), 'load')
 
     return df
 
@@ -190,12 +263,16 @@ def main(delay=None, verbose=False):
         dam_m.solve('cbc', verbose=False)
 
         rtm_s = df.loc[day, 'LOAD'].resample('5T').mean()
+        rtm_m = None
 
         for interval in range(0, int(24 * 60 / 5)):
             hour = int(interval * 5 / 60)
             logger.info("Running RTM for day={day} for minute={m} (hour={hour})".format(day=day, m=interval * 5, hour=hour))
             commitment = dam_m.results.unit_commitment.loc[hour:hour, :]
-            rtm_m = build_RTM_model(day, rtm_s.iloc[interval], commitment)
+            if rtm_m is None:
+                rtm_m = build_RTM_model(day, rtm_s.iloc[interval], commitment)
+            else:
+                rtm_m = update_RTM_model(rtm_m, rtm_s.iloc[interval], commitment)
             rtm_m.solve('cbc', verbose=False)
             logger.debug("LMP = {lmp} \t Power Generated = {pg}".format(lmp=rtm_m.results.lmp, pg=rtm_m.results.power_generated))
 
@@ -21,7 +21,7 @@ def create_broker():
 
     return broker
 
-def create_federate(deltat=1.0, fedinitstring="--federates=1"):
+def create_federate(deltat=1.0, fedinitstring="--federates=1", realtime=False):
 
     fedinfo = h.helicsCreateFederateInfo()
 
@@ -37,6 +37,10 @@ def create_federate(deltat=1.0, fedinitstring="--federates=1"):
     h.helicsFederateInfoSetTimeProperty(fedinfo, h.helics_property_time_delta, deltat)
     # assert status == 0
 
+    # In real-time mode HELICS only grants a time once that much wall-clock
+    #   time has passed since the federate entered execution mode
+    h.helicsFederateInfoSetFlagOption(fedinfo, h.helics_flag_realtime, realtime)
+
     # h.helicsFederateInfoSetLoggingLevel(fedinfo, 1)
     # assert status == 0
 
@@ -50,8 +54,9 @@ def destroy_federate2(fed, broker=None):
     state = h.helicsFederateGetState(fed)
     assert state == 3
 
-    while (h.helicsBrokerIsConnected(broker)):
-        time.sleep(1)
+    if broker is not None:
+        # Returns as soon as the broker disconnects (-1: no timeout)
+        h.helicsBrokerWaitForDisconnect(broker, -1)
 
     h.helicsFederateFree(fed)
 
@@ -79,10 +84,40 @@ def destroy_federate(fed):
     logger.info("Federate finalized")
 
 
+def wait_for_wall_clock(start, grantedtime, pacing):
+    """
+    Paces the federate against wall-clock time. Real time (pacing 1) is
+    left to HELICS through the real-time flag (helics_flag_realtime), which
+    only grants a time once that much wall-clock time has passed. HELICS has
+    no scaled real-time mode, so any other pacing falls back on sleeping
+    here. The wait is worked out from the granted (simulation) time rather
+    than being a fixed sleep per step, so waits don't pile up and the
+    federate never runs behind the pacing. The tutorial 2 federate and
+    mock_griddyn.py follow the same rules.
+
+    :param start: Wall-clock time (time.monotonic()) when simulation time was 0
+    :param grantedtime: Time granted by HELICS (seconds)
+    :param pacing: Simulated seconds per wall-clock second, or None to run
+        as fast as possible
+    :return: (none)
+    """
+    if pacing is None:
+        return
+    delay = start + grantedtime / pacing - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+
 
-def main():
+
+def main(pacing=None):
+    """
+    :param pacing: None to run as fast as possible, 1 to run in real time
+        (using the HELICS real-time mode) or any other value to run that
+        many simulated seconds per wall-clock second
+    """
     # broker = create_broker() # Broker already created from 1st terminal
-    fed = create_federate()
+    realtime = pacing == 1
+    fed = create_federate(realtime=realtime)
     
     # Register publication
     pubid = h.helicsFederateRegisterGlobalPublication(fed, "TransmissionSim/B2Voltage", h.helics_data_type_complex, "")
@@ -97,6 +132,7 @@ def main():
     
     # Enter execution mode
     h.helicsFederateEnterExecutingMode(fed)
+    start = time.monotonic()
     
     hours = 1
     seconds = int(60 * 60 * hours)
@@ -109,7 +145,8 @@ def main():
         # status = h.helicsEndpointSendEventRaw(epid, "fixed_price", 10, t)
         while grantedtime < t:
             grantedtime = h.helicsFederateRequestTime(fed, t)
-        time.sleep(1)
+        if not realtime:
+            wait_for_wall_clock(start, grantedtime, pacing)
         rValue, iValue = h.helicsInputGetComplex(subid)
         logger.info("Python Federate grantedtime = {}".format(grantedtime))
         logger.info("Load value = {} MVA".format(complex(rValue, iValue)/1000))
@@ -121,7 +158,14 @@ def main():
     destroy_federate(fed)
 
 if __name__ == "__main__":
-    # main()
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pacing", type=float,
+                        help="simulated seconds per wall-clock second; 1 is real time "
+                             "(default: as fast as possible)")
+    args = parser.parse_args()
+    pacing = args.pacing
+    # main(pacing=pacing)
     logger.info("Done!")
     # based on fundamental_default/Battery.py
 
@@ -153,8 +197,16 @@ if __name__ == "__main__":
     pub_name = h.helicsPublicationGetName(pubid)
     logger.debug(f"\tRegistered publication---> {pub_name}")
 
+    # Pacing 1 is real time, which HELICS does itself: a time is only
+    #   granted once that much wall-clock time has passed since the
+    #   federate entered execution mode
+    realtime = pacing == 1
+    if realtime:
+        h.helicsFederateSetFlagOption(fed, h.HELICS_FLAG_REALTIME, True)
+
     ##############  Entering Execution Mode  ##################################
     h.helicsFederateEnterExecutingMode(fed)
+    start = time.monotonic()
     logger.info("Entered HELICS execution mode")
 
     hours = 1
@@ -176,6 +228,8 @@ if __name__ == "__main__":
         logger.debug(f"Requesting time {requested_time}")
         grantedtime = h.helicsFederateRequestTime(fed, requested_time)
         logger.debug(f"Granted time {grantedtime}")
+        if not realtime:
+            wait_for_wall_clock(start, grantedtime, pacing)
 
 
         #rValue, iValue = h.helicsInputGetComplex((subid))
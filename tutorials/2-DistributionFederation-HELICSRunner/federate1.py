@@ -18,7 +18,7 @@ def create_broker():
     return broker
 
 
-def create_federate(deltat=1.0, fedinitstring="--federates=1"):
+def create_federate(deltat=1.0, fedinitstring="--federates=1", realtime=False):
 
     fedinfo = h.helicsFederateInfoCreate()
 
@@ -37,28 +37,41 @@ def create_federate(deltat=1.0, fedinitstring="--federates=1"):
     status = h.helicsFederateInfoSetLoggingLevel(fedinfo, 1)
     assert status == 0
 
+    # Real time (pacing 1) is paced by HELICS itself
+    status = h.helicsFederateInfoSetFlag(fedinfo, h.helics_flag_realtime, realtime)
+    assert status == 0
+
     fed = h.helicsCreateCombinationFederate(fedinfo)
 
     return fed
 
-def destroy_federate(fed, broker):
+def destroy_federate(fed, broker=None):
     status = h.helicsFederateFinalize(fed)
 
     status, state = h.helicsFederateGetState(fed)
     assert state == 3
 
-    while (h.helicsBrokerIsConnected(broker)):
-        time.sleep(1)
+    if broker is not None:
+        # Returns as soon as the broker disconnects (-1: no timeout)
+        h.helicsBrokerWaitForDisconnect(broker, -1)
 
     h.helicsFederateFree(fed)
 
     h.helicsCloseLibrary()
 
 
-def main():
+def wait_for_wall_clock(start, grantedtime, pacing):
+    # Scaled pacing; see wait_for_wall_clock() in
+    #   tutorials/1-DistributionFederation-ManualStart/federate1.py
+    delay = start + grantedtime / pacing - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
 
+
+def main(pacing=None):
+    realtime = pacing == 1
     # broker = create_broker()
-    fed = create_federate()
+    fed = create_federate(realtime=realtime)
 
     pubid = h.helicsFederateRegisterGlobalTypePublication (fed, "TransmissionSim/B2Voltage", h.HELICS_DATA_TYPE_COMPLEX, "")
     subid = h.helicsFederateRegisterSubscription (fed, "DistributionSim_B2_G_1/totalLoad", "complex", "")
@@ -67,6 +80,7 @@ def main():
     h.helicsSubscriptionSetDefaultComplex(subid, 0, 0)
 
     h.helicsFederateEnterExecutionMode(fed)
+    start = time.monotonic()
 
     hours = 1
     seconds = int(60 * 60 * hours)
@@ -79,7 +93,8 @@ def main():
         # status = h.helicsEndpointSendEventRaw(epid, "fixed_price", 10, t)
         while grantedtime < t:
             status, grantedtime = h.helicsFederateRequestTime (fed, t)
-        time.sleep(1)
+        if pacing is not None and not realtime:
+            wait_for_wall_clock(start, grantedtime, pacing)
         status, rValue, iValue = h.helicsSubscriptionGetComplex(subid)
         logger.info("Python Federate grantedtime = {}".format(grantedtime))
         logger.info("Load value = {} MW".format(complex(rValue, iValue)/1000))
@@ -92,8 +107,14 @@ def main():
 
 
 if __name__ == "__main__":
-
-    main()
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pacing", type=float,
+                        help="simulated seconds per wall-clock second; 1 is real time "
+                             "(default: as fast as possible)")
+
+    args = parser.parse_args()
+    main(pacing=args.pacing)
     logger.info("Done!")
 
 
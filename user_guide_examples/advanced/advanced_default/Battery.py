@@ -18,11 +18,13 @@ import helics as h
 import logging
 import numpy as np
 import matplotlib.pyplot as plt
+from activeset import ActiveSet, ACTIVE, REPLACED
+from batteryfleet import BatteryFleet
+from valuegroups import InputGroup, PublicationGroup
+from fedlogging import get_logger, lazy
 
 
-logger = logging.getLogger(__name__)
-logger.addHandler(logging.StreamHandler())
-logger.setLevel(logging.DEBUG)
+logger = get_logger(__name__, "BatteryConfig.json")
 
 
 
@@ -89,18 +91,24 @@ if __name__ == "__main__":
     # Diagnostics to confirm JSON config correctly added the required
     #   publications and subscriptions
     subid = {}
-    sub_name = {}
     for i in range(0, sub_count):
         subid[i] = h.helicsFederateGetInputByIndex(fed, i)
-        sub_name[i] = h.helicsSubscriptionGetTarget(subid[i])
-        logger.debug(f'\tRegistered subscription---> {sub_name[i]}')
 
     pubid = {}
-    pub_name = {}
     for i in range(0, pub_count):
         pubid[i] = h.helicsFederateGetPublicationByIndex(fed, i)
-        pub_name[i] = h.helicsPublicationGetName(pubid[i])
-        logger.debug(f'\tRegistered publication---> {pub_name[i]}')
+
+    # All inputs and publications are read/published as a group each
+    #   time step; the names are only looked up here, once.
+    inputs = InputGroup(subid)
+    for name in inputs.names:
+        logger.debug(f'\tRegistered subscription---> {name}')
+    # Charging currents that have changed by less than 0.1% (well under
+    #   the noise on the Charger's current measurement) aren't republished
+    pubs = PublicationGroup(pubid, abs_deadband=0, rel_deadband=1e-3,
+                            max_silence=900)
+    for name in pubs.names:
+        logger.debug(f'\tRegistered publication---> {name}')
 
 
 
@@ -122,13 +130,20 @@ if __name__ == "__main__":
     socs = np.array([0, 1])
     effective_R = np.array([8, 150])
 
-    batt_list = get_new_battery(pub_count)
-
-    current_soc = {}
-    for i in range (0, pub_count):
-        current_soc[i] = (np.random.randint(0,60))/100
-
-
+    # The fleet holds the size and SOC of every battery in arrays so the
+    #   physics of all batteries is advanced in a single call. Batteries
+    #   keep charging until the charger removes the voltage, so there
+    #   is no cutoff at full SOC. The SOC is integrated exactly so it
+    #   doesn't depend on the time step.
+    initial_soc = np.random.randint(0, 60, pub_count) / 100
+    fleet = BatteryFleet(get_new_battery(pub_count), initial_soc,
+                         socs, effective_R, cutoff=False, exact=True)
+
+    # A battery is active while it's being charged. When the charger
+    #   removes the voltage its EV leaves and a new EV's battery, in the
+    #   replaced set, waits for voltage; only active batteries are
+    #   advanced each step.
+    batteries = ActiveSet(pub_count)
 
     # Data collection lists
     time_sim = []
@@ -140,57 +155,69 @@ if __name__ == "__main__":
 
         # Time request for the next physical interval to be simulated
         requested_time = (grantedtime+update_interval)
-        logger.debug(f'Requesting time {requested_time}')
+        logger.debug('Requesting time %s', requested_time)
         grantedtime = h.helicsFederateRequestTime (fed, requested_time)
-        logger.debug(f'Granted time {grantedtime}')
+        logger.debug('Granted time %s', grantedtime)
+
+        # Get the applied charging voltage from the EV
+        charging_voltage = inputs.get_double()
+
+        # EV is fully charged and a new EV is moving in
+        # This is indicated by the charging removing voltage when it
+        #    thinks the EV is full
+        active = batteries.active
+        new_ev = active[charging_voltage[active] == 0]
+        num_new = new_ev.size
+        if num_new > 0:
+            fleet.replace(new_ev, get_new_battery(num_new),
+                          np.random.randint(0, 80, num_new) / 100)
+            fleet.stop(new_ev)
+            batteries.move(new_ev, REPLACED)
+
+        # New batteries start charging once the charger applies voltage
+        waiting = batteries.replaced
+        batteries.move(waiting[charging_voltage[waiting] > 0], ACTIVE)
+
+        # Calculate charging current and update SOC
+        charging_current = fleet.advance(charging_voltage, update_interval,
+                                         batteries.active)
+
+        # Per-battery diagnostics are only assembled when someone is
+        #   going to read them.
+        if logger.isEnabledFor(logging.DEBUG):
+            for j in range(0,sub_count):
+                logger.debug(f'Battery {j+1} time {grantedtime}')
+                logger.debug(f'\tReceived voltage {charging_voltage[j]:.2f} from input'
+                             f' {inputs.names[j]}')
+                logger.debug(f'\tEffective R (ohms): {fleet.R[j]:.2f}')
+                logger.debug(f'\tCharging current (A): {charging_current[j]:.2f}')
+                logger.debug(f'\tAdded energy (kWh): {fleet.added_energy[j]:.4f}')
+                logger.debug(f'\tSOC: {fleet.soc[j]:.4f}')
+        logger.data('%s,%s', grantedtime, lazy(lambda soc: ','.join(map(str, soc)), fleet.soc))
 
         for j in range(0,sub_count):
-            logger.debug(f'Battery {j+1} time {grantedtime}')
-
-            # Get the applied charging voltage from the EV
-            charging_voltage = h.helicsInputGetDouble((subid[j]))
-            logger.debug(f'\tReceived voltage {charging_voltage:.2f} from input'
-                         f' {h.helicsSubscriptionGetTarget(subid[j])}')
-
-            # EV is fully charged and a new EV is moving in
-            # This is indicated by the charging removing voltage when it
-            #    thinks the EV is full
-            if charging_voltage == 0:
-                new_batt = get_new_battery(1)
-                batt_list[j] = new_batt[0]
-                current_soc[j] = (np.random.randint(0,80))/100
-                charging_current = 0
-
-            # Calculate charging current and update SOC
-            R =  np.interp(current_soc[j], socs, effective_R)
-            logger.debug(f'\tEffective R (ohms): {R:.2f}')
-            charging_current = charging_voltage / R
-            logger.debug(f'\tCharging current (A): {charging_current:.2f}')
-            added_energy = (charging_current * charging_voltage * \
-                           update_interval/3600) / 1000
-            logger.debug(f'\tAdded energy (kWh): {added_energy:.4f}')
-            current_soc[j] = current_soc[j] + added_energy / batt_list[j]
-            logger.debug(f'\tSOC: {current_soc[j]:.4f}')
-
-
-
-            # Publish out charging current
-            h.helicsPublicationPublishDouble(pubid[j], charging_current)
-            logger.debug(f'\tPublished {pub_name[j]} with value '
-                         f'{charging_current:.2f}')
-
             # Store SOC for later analysis/graphing
             if subid[j] not in soc:
                 soc[subid[j]] = []
-            soc[subid[j]].append(float(current_soc[j]))
+            soc[subid[j]].append(float(fleet.soc[j]))
+
+        # Publish out charging current; values within the deadband aren't
+        #   sent (or logged)
+        published = pubs.publish_double(charging_current, grantedtime)
+        if logger.isEnabledFor(logging.DEBUG):
+            for j in np.flatnonzero(published):
+                logger.debug(f'Battery {j+1}: published {pubs.names[j]} with value '
+                             f'{charging_current[j]:.2f}')
 
         # Data collection vectors
         time_sim.append(grantedtime)
-        current.append(charging_current)
+        current.append(charging_current[-1])
 
 
 
     # Cleaning up HELICS stuff once we've finished the co-simulation.
+    logger.info('Charging current publications suppressed: %.1f%%',
+                100 * pubs.suppression_ratio())
     destroy_federate(fed)
     # Printing out final results graphs for comparison/diagnostic purposes.
     xaxis = np.array(time_sim)/3600
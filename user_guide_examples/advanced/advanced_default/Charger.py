@@ -21,11 +21,14 @@ import helics as h
 import logging
 import numpy as np
 import matplotlib.pyplot as plt
+from activeset import ActiveSet, ACTIVE, IDLE, REPLACED
+from chargerbank import ChargerBank
+from valuegroups import InputGroup, PublicationGroup
+from fedlogging import get_logger, lazy
+import messagecodec
 
 
-logger = logging.getLogger(__name__)
-logger.addHandler(logging.StreamHandler())
-logger.setLevel(logging.DEBUG)
+logger = get_logger(__name__, "ChargerConfig.json")
 
 def destroy_federate(fed):
     '''
@@ -49,13 +52,14 @@ def destroy_federate(fed):
     logger.info('Federate finalized')
 
 
-def get_new_EV(numEVs):
+def get_new_EV(numEVs, rng=np.random):
     '''
     Using hard-coded probabilities, a distribution of EVs with support
     for specific charging levels are generated. The number of EVs
     generated is defined by the user.
 
     :param numEVs: Number of EVs
+    :param rng: numpy Generator (or np.random) used for the draw
     :return
         numLvL1: Number of new EVs that will charge at level 1
         numLvL2: Number of new EVs that will charge at level 2
@@ -68,7 +72,7 @@ def get_new_EV(numEVs):
     lvl1 = 0.05
     lvl2 = 0.6
     lvl3 = 0.35
-    listOfEVs = np.random.choice([1,2,3],numEVs,p=[lvl1,lvl2,lvl3]).tolist()
+    listOfEVs = rng.choice([1,2,3],numEVs,p=[lvl1,lvl2,lvl3]).tolist()
     numLvl1 = listOfEVs.count(1)
     numLvl2 = listOfEVs.count(2)
     numLvl3 = listOfEVs.count(3)
@@ -76,67 +80,8 @@ def get_new_EV(numEVs):
     return numLvl1,numLvl2,numLvl3,listOfEVs
 
 
-
-
-def calc_charging_voltage(EV_list):
-    '''
-    This function uses the pre-defined charging powers and maps them to
-    standard (more or less) charging voltages. This allows the charger
-    to apply an appropriately modeled voltage to the EV based on the
-    charging power level
-
-    :param EV_list: Value of "1", "2", or "3" to indicate charging level
-    :return: charging_voltage: List of charging voltages corresponding
-            to the charging power.
-    '''
-
-    charging_voltage = []
-    # Ignoring the difference between AC and DC voltages for this application
-    charge_voltages = [120, 240, 630]
-    for EV in EV_list:
-        if EV == 1:
-            charging_voltage.append(charge_voltages[0])
-        elif EV==2:
-            charging_voltage.append(charge_voltages[1])
-        elif EV==3:
-            charging_voltage.append(charge_voltages[2])
-        else:
-            charging_voltage.append(0)
-
-    return charging_voltage
-
-
-def estimate_SOC(charging_V, charging_A):
-    '''
-    The charger has no direct knowledge of the SOC of the EV battery it
-    is charging but instead must estimate it based on the effective resistance
-    of the battery which is calculated from the applied charging voltage and
-    measured charging current. The effective resistance model is used here is
-    identical to that of the actual battery; if both the charging voltage
-    and current were measured perfectly the SOC estimate here would exactly
-    match the true SOC modeled by the battery. For fun, though, a small
-    amount of Gaussian noise is added to the current value. This noise
-    creates larger errors as the charging current goes down (EV battery
-    reaching full SOC).
-
-    :param charging_V: Applied charging voltage
-    :param charging_A: Charging current as passed back by the battery federate
-    :return: SOC estimate
-    '''
-    socs = np.array([0, 1])
-    effective_R = np.array([8, 150])
-    mu = 0
-    sigma = 0.2
-    noise = np.random.normal(mu, sigma)
-    measured_A = charging_A + noise
-    measured_R = charging_V / measured_A
-    SOC_estimate = np.interp(measured_R, effective_R, socs)
-
-    return SOC_estimate
-
-
 if __name__ == "__main__":
-    np.random.seed(1490)
+    rng = np.random.default_rng(1490)
 
     ##############  Registering  federate from json  ##########################
     fed = h.helicsCreateCombinationFederateFromConfig("ChargerConfig.json")
@@ -156,31 +101,36 @@ if __name__ == "__main__":
     # Diagnostics to confirm JSON config correctly added the required
     #   endpoints, publications, and subscriptions.
     endid = {}
+    end_name = {}
     for i in range(0, end_count):
         endid[i] = h.helicsFederateGetEndpointByIndex(fed, i)
-        end_name = h.helicsEndpointGetName(endid[i])
-        logger.debug(f'\tRegistered Endpoint ---> {end_name}')
+        end_name[i] = h.helicsEndpointGetName(endid[i])
+        logger.debug(f'\tRegistered Endpoint ---> {end_name[i]}')
     subid = {}
     for i in range(0, sub_count):
         subid[i] = h.helicsFederateGetInputByIndex(fed, i)
-        sub_name = h.helicsSubscriptionGetTarget(subid[i])
-        logger.debug(f'\tRegistered subscription---> {sub_name}')
 
     pubid = {}
     for i in range(0, pub_count):
         pubid[i] = h.helicsFederateGetPublicationByIndex(fed, i)
-        pub_name = h.helicsPublicationGetName(pubid[i])
-        logger.debug(f'\tRegistered publication---> {pub_name}')
+
+    # All inputs and publications are read/published as a group each
+    #   time step; the names are only looked up here, once.
+    inputs = InputGroup(subid)
+    for name in inputs.names:
+        logger.debug(f'\tRegistered subscription---> {name}')
+    # The charging voltages only change when an EV is told to stop or a
+    #   new EV moves in, so only changes are published (and every value
+    #   at least once an hour)
+    pubs = PublicationGroup(pubid, abs_deadband=0, max_silence=3600)
+    for name in pubs.names:
+        logger.debug(f'\tRegistered publication---> {name}')
 
 
     ##############  Entering Execution Mode  ##################################
     h.helicsFederateEnterExecutingMode(fed)
     logger.info('Entered HELICS execution mode')
 
-    # Definition of charging power level (in kW) for level 1, 2, 3 chargers
-    charge_rate = [1.8,7.2,50]
-
-
 
     hours = 24*7 # one week
     total_interval = int(60 * 60 * hours)
@@ -192,14 +142,20 @@ if __name__ == "__main__":
     # Generate an initial fleet of EVs, one for each previously defined
     #   endpoint. This gives each EV a unique link to the EV controller
     #   federate.
-    numLvl1,numLvl2,numLvl3,EVlist = get_new_EV(end_count)
-    charging_voltage = calc_charging_voltage(EVlist)
-    currentsoc = {}
+    # The bank holds the charging level, voltage, current and SOC estimate
+    #   of every terminal in arrays and updates them all at once.
+    numLvl1,numLvl2,numLvl3,EVlist = get_new_EV(end_count, rng)
+    bank = ChargerBank(EVlist, rng)
+
+    # Ports move from active (EV charging) to idle once the EV Controller
+    #   stops them, to replaced once the new EV is plugged in and back to
+    #   active the step after; the per-step modeling is only done for
+    #   the active ports.
+    ports = ActiveSet(end_count)
 
     # Data collection lists
     time_sim = []
     power = []
-    charging_current = {}
 
     # Blocking call for a time request at simulation time 0
     initial_time = 60
@@ -209,9 +165,9 @@ if __name__ == "__main__":
 
 
     # Apply initial charging voltage
-    for j in range(0, pub_count):
-        h.helicsPublicationPublishDouble(pubid[j], charging_voltage[j])
-        logger.debug(f'\tPublishing charging voltage of {charging_voltage[j]} '
+    published = pubs.publish_double(bank.voltage, grantedtime)
+    for j in np.flatnonzero(published):
+        logger.debug(f'\tPublishing charging voltage of {bank.voltage[j]} '
                      f' at time {grantedtime}')
 
 
@@ -221,90 +177,106 @@ if __name__ == "__main__":
 
         # Time request for the next physical interval to be simulated
         requested_time = (grantedtime + update_interval)
-        logger.debug(f'Requesting time {requested_time}')
+        logger.debug('Requesting time %s', requested_time)
         grantedtime = h.helicsFederateRequestTime (fed, requested_time)
-        logger.debug(f'Granted time {grantedtime}')
-
-        for j in range(0,end_count):
-
-            logger.debug(f'EV {j+1} time {grantedtime}')
-            # Model the physics of the battery charging. This happens
-            #   every time step whether a message comes in or not and always
-            #   uses the latest value provided by the battery model.
-            charging_current[j] = h.helicsInputGetDouble((subid[j]))
-            logger.debug(f'\tCharging current: {charging_current[j]:.2f} from '
-                         f'input {h.helicsSubscriptionGetTarget(subid[j])}')
-
-            # New EV is in place after removing charge from old EV,
-            # as indicated by the zero current draw.
-            if charging_current[j] == 0:
-                _, _, _, newEVtype = get_new_EV(1)
-                EVlist[j] = newEVtype[0]
-                charge_V = calc_charging_voltage(newEVtype)
-                charging_voltage[j] = charge_V[0]
-
-                currentsoc[j] = 0 # Initial SOC estimate
-                logger.debug(f'\t New EV, SOC estimate: {currentsoc[j]:.4f}')
-                logger.debug(f'\t New EV, charging voltage:'
-                             f' {charging_voltage[j]}')
-            else:
-                # SOC estimation
-                currentsoc[j] = estimate_SOC(charging_voltage[j], charging_current[j])
-                logger.debug(f'\t EV SOC estimate: {currentsoc[j]:.4f}')
-
-
-
-        # Check for messages from EV Controller
-            endpoint_name = h.helicsEndpointGetName(endid[j])
-            if h.helicsEndpointHasMessage(endid[j]):
-                msg = h.helicsEndpointGetMessage(endid[j])
-                instructions = h.helicsMessageGetString(msg)
-                source = h.helicsMessageGetOriginalSource(msg)
-                logger.debug(f'\tReceived message at endpoint {endpoint_name}'
-                             f' from source {source}'
-                             f' at time {grantedtime}'
-                             f' with command {instructions}')
-
-                # Update charging state based on message from controller
-                # The protocol used by the EV and the EV Controller is simple:
-                #       EV Controller sends "1" - keep charging
-                #       EV Controller sends anything else: stop charging
-                # The default state is charging (1) so we only need to
-                #   do something if the controller says to stop
-                if int(instructions) == 0:
-                    # Stop charing this EV
-                    charging_voltage[j] = 0
-                    logger.info(f'\tEV full; removing charging voltage')
-            else:
-                logger.debug(f'\tNo messages at endpoint {endpoint_name} '
-                             f'recieved at '
-                             f'time {grantedtime}')
-
-            # Publish updated charging voltage
-            h.helicsPublicationPublishDouble(pubid[j], charging_voltage[j])
-            logger.debug(f'\tPublishing charging voltage of {charging_voltage[j]} '
-                         f' at time {grantedtime}')
-
-            # Send message to Controller with SOC every 15 minutes
-            if grantedtime % 900 == 0:
-                destination_name = str(
-                    h.helicsEndpointGetDefaultDestination(endid[j]))
-                message = f'{currentsoc[j]:4f}'
-                h.helicsEndpointSendBytesTo(endid[j], message.encode(), '')  #
-                logger.debug(f'Sent message from endpoint {endpoint_name}'
-                             f' to destination {destination_name}'
-                             f' at time {grantedtime}'
-                             f' with payload SOC {message}')
+        logger.debug('Granted time %s', grantedtime)
+
+        # Model the physics of the battery charging. This happens
+        #   every time step whether a message comes in or not and always
+        #   uses the latest value provided by the battery model.
+        charging_current = inputs.get_double()
+
+        # EVs plugged in last step are now charging
+        ports.move(ports.replaced, ACTIVE)
+
+        # SOC estimation
+        bank.estimate_SOC(charging_current, ports.active)
+
+        # New EV is in place after removing charge from old EV,
+        # as indicated by the zero current draw.
+        idle = ports.idle
+        new_EV = idle[charging_current[idle] == 0]
+        if new_EV.size:
+            _, _, _, newEVtypes = get_new_EV(new_EV.size, rng)
+            bank.replace(new_EV, newEVtypes)
+            ports.move(new_EV, REPLACED)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            for j in range(0,end_count):
+                logger.debug('EV %d time %s', j+1, grantedtime)
+                logger.debug('\tCharging current: %.2f from input %s',
+                             charging_current[j], inputs.names[j])
+                if ports.state[j] == REPLACED:
+                    logger.debug('\t New EV, SOC estimate: %.4f',
+                                 bank.soc_estimate[j])
+                    logger.debug('\t New EV, charging voltage: %s',
+                                 bank.voltage[j])
+                else:
+                    logger.debug('\t EV SOC estimate: %.4f',
+                                 bank.soc_estimate[j])
+
+        # SOC messages to the Controller every 15 minutes, encoded in one
+        #   batch
+        send_soc = grantedtime % 900 == 0
+        if send_soc:
+            soc_messages = messagecodec.encode(messagecodec.SOC,
+                                               bank.soc_estimate)
+
+        # Instructions from the EV Controller only come in reply to the
+        #   SOC messages, so the endpoints are only checked when there are
+        #   messages waiting.
+        if h.helicsFederateHasMessage(fed):
+            for j in range(0,end_count):
+
+                # Check for messages from EV Controller
+                endpoint_name = end_name[j]
+                if h.helicsEndpointHasMessage(endid[j]):
+                    msg = h.helicsEndpointGetMessage(endid[j])
+                    instructions = messagecodec.unpack(
+                        messagecodec.INSTRUCTION, h.helicsMessageGetBytes(msg))
+                    source = h.helicsMessageGetOriginalSource(msg)
+                    logger.debug('\tReceived message at endpoint %s'
+                                 ' from source %s at time %s with command %s',
+                                 endpoint_name, source, grantedtime, instructions)
+
+                    # Update charging state based on message from controller
+                    # The protocol used by the EV and the EV Controller is simple:
+                    #       EV Controller sends "1" - keep charging
+                    #       EV Controller sends anything else: stop charging
+                    # The default state is charging (1) so we only need to
+                    #   do something if the controller says to stop; ports
+                    #   that aren't charging have nothing to stop.
+                    if instructions == 0 and ports.state[j] == ACTIVE:
+                        # Stop charing this EV
+                        bank.voltage[j] = 0
+                        ports.move([j], IDLE)
+                        logger.info(f'\tEV full; removing charging voltage')
+        else:
+            logger.debug('\tNo messages recieved at time %s', grantedtime)
+
+        # Send message to Controller with SOC of every port every 15 minutes
+        if send_soc:
+            for j in range(0,end_count):
+                destination_name = lazy(
+                    h.helicsEndpointGetDefaultDestination, endid[j])
+                h.helicsEndpointSendBytesTo(endid[j], soc_messages[j], '')  #
+                logger.debug('Sent message from endpoint %s'
+                             ' to destination %s at time %s with payload SOC %.4f',
+                             end_name[j], destination_name, grantedtime,
+                             bank.soc_estimate[j])
+
+        # Publish updated charging voltage; values within the deadband
+        #   aren't sent (or logged)
+        published = pubs.publish_double(bank.voltage, grantedtime)
+        if logger.isEnabledFor(logging.DEBUG):
+            for j in np.flatnonzero(published):
+                logger.debug('EV %d: publishing charging voltage of %s  at time %s',
+                             j+1, bank.voltage[j], grantedtime)
 
         # Calculate the total power required by all chargers. This is the
         #   primary metric of interest, to understand the power profile
         #   and capacity requirements required for this charging garage.
-        total_power = 0
-        #logger.debug(f'Calculating charging power')
-        for j in range(0,pub_count):
-            charging_power = charge_rate[(EVlist[j]-1)]
-            total_power += charging_voltage[j] * charging_current[j]
-            #logger.debug(f'\tCharging power in kW for EV{j+1}: {charging_power}')
+        total_power = bank.power()
 
         # Data collection vectors
         time_sim.append(grantedtime)
@@ -313,6 +285,8 @@ if __name__ == "__main__":
 
 
     # Cleaning up HELICS stuff once we've finished the co-simulation.
+    logger.info('Charging voltage publications suppressed: %.1f%%',
+                100 * pubs.suppression_ratio())
     destroy_federate(fed)
 
     # Output graph showing the charging profile for each of the charging
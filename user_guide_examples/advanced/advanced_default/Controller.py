@@ -18,10 +18,11 @@ import sys
 import time
 import matplotlib.pyplot as plt
 import pandas as pd
+from fedlogging import get_logger
+import messagecodec
+from messagebatch import Mailbox
 
-logger = logging.getLogger(__name__)
-logger.addHandler(logging.StreamHandler())
-logger.setLevel(logging.DEBUG)
+logger = get_logger(__name__, "ControllerConfig.json")
 
 
 def destroy_federate(fed):
@@ -82,45 +83,39 @@ if __name__ == "__main__":
     logger.debug(f'Granted time {grantedtime}')
 
 
+    mailbox = Mailbox(endid, messagecodec.SOC)
     time_sim = []
-    soc = {}
+    received = []
 
     while grantedtime < total_interval:
 
         # In HELICS, when multiple messages arrive at an endpoint they
-        # queue up and are popped off one-by-one with the
-        #   "helicsEndpointHasMessage" API call. When that API doesn't
-        #   return a message, you've processed them all.
-        while h.helicsEndpointHasMessage(endid):
-
-            # Get the SOC from the EV/charging terminal in question
-            msg = h.helicsEndpointGetMessage(endid)
-            currentsoc = h.helicsMessageGetString(msg)
-            source = h.helicsMessageGetOriginalSource(msg)
-            logger.debug(f'\tReceived message from endpoint {source}'
-                         f' at time {grantedtime}'
-                         f' with SOC {currentsoc}')
+        # queue up until they are read. All of them (the SOC of each
+        #   EV/charging terminal that has reported) are pulled in at once.
+        batch = mailbox.receive()
+        if len(batch) > 0:
 
             # Send back charging command based on current SOC
             #   Our very basic protocol:
             #       If the SOC is less than soc_full keep charging (send "1")
             #       Otherwise, stop charging (send "0")
             soc_full = 0.95
-            if float(currentsoc) <= soc_full:
-                instructions = 1
-            else:
-                instructions = 0
-            message = str(instructions)
-            h.helicsEndpointSendBytesTo(endid, message.encode(), source)
-            logger.debug(f'\tSent message to endpoint {source}'
-                         f' at time {grantedtime}'
-                         f' with payload {instructions}')
+            instructions = (batch["value"] <= soc_full).astype(int)
+            mailbox.reply(batch, messagecodec.INSTRUCTION, instructions)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                for source, currentsoc, instruction in zip(
+                        batch["source"], batch["value"], instructions):
+                    logger.debug('\tReceived message from endpoint %s'
+                                 ' at time %s with SOC %.4f',
+                                 mailbox.sources[source], grantedtime, currentsoc)
+                    logger.debug('\tSent message to endpoint %s'
+                                 ' at time %s with payload %s',
+                                 mailbox.sources[source], grantedtime, instruction)
 
             # Store SOC for later analysis/graphing
-            if source not in soc:
-                soc[source] = []
-            soc[source].append(float(currentsoc))
-            
+            received.append(batch)
+
             if len(time_sim) > 0:
                 if time_sim[-1] != grantedtime:
                     time_sim.append(grantedtime)
@@ -131,18 +126,19 @@ if __name__ == "__main__":
         #   nothing else for the federate to do until/unless another
         #   message comes in. Request a time very far into the future
         #   and take a break until/unless a new message arrives.
-        logger.debug(f'Requesting time {h.HELICS_TIME_MAXTIME}')
+        logger.debug('Requesting time %s', h.HELICS_TIME_MAXTIME)
         grantedtime = h.helicsFederateRequestTime (fed, h.HELICS_TIME_MAXTIME)
-        logger.info(f'Granted time: {grantedtime}')
+        logger.info('Granted time: %s', grantedtime)
 
     # Close out co-simulation execution cleanly now that we're done.
     destroy_federate(fed)
 
     # Printing out final results graphs for comparison/diagnostic purposes.
     xaxis = np.array(time_sim)/3600
+    received = np.concatenate(received) if received else np.empty(0, mailbox.dtype)
     y = []
-    for key in soc:
-        y.append(np.array(soc[key]))
+    for source in range(len(mailbox.sources)):
+        y.append(received["value"][received["source"] == source])
 
 
     fig, axs = plt.subplots(5, sharex=True, sharey=True)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Logging shared by the federates in this example. The log level is read
+from the federate's JSON config (the "python_log_level" entry, alongside
+the HELICS "log_level") so the amount of Python-side output can be changed
+without editing the federate. A "DATA" level below DEBUG is added for
+dumping simulation data.
+
+Messages logged from inside the time loop should be written with %-style
+arguments so the string is only built if the message is actually emitted,
+and any HELICS API call made purely to fill in a message should be wrapped
+in lazy() so it is only made in that case too. Blocks of per-EV messages
+can be skipped entirely by checking logger.isEnabledFor() once per time
+step.
+"""
+import json
+import logging
+
+# Adding custom logging level "DATA" to use for putting
+#  all the simulation data on. "DATA" is between "DEBUG"
+#  and "NOTSET" in terms of priority.
+DATA_LEVEL_NUM = 5
+logging.addLevelName(DATA_LEVEL_NUM, "DATA")
+
+
+def data(self, message, *args, **kws):
+    if self.isEnabledFor(DATA_LEVEL_NUM):
+        self._log(DATA_LEVEL_NUM, message, args, **kws)
+
+
+logging.DATA = DATA_LEVEL_NUM
+logging.Logger.data = data
+
+LEVELS = {"none": logging.CRITICAL + 10,
+          "critical": logging.CRITICAL,
+          "error": logging.ERROR,
+          "warning": logging.WARNING,
+          "info": logging.INFO,
+          "debug": logging.DEBUG,
+          "data": DATA_LEVEL_NUM}
+
+
+def get_logger(name, config_file=None, default="debug"):
+    '''
+    Creates the federate logger with its level taken from the
+    "python_log_level" entry of the federate JSON config. Valid levels are
+    "none", "critical", "error", "warning", "info", "debug" and "data".
+
+    :param name: Name of the logger (generally __name__)
+    :param config_file: Federate JSON config file
+    :param default: Level used if the config doesn't specify one
+    :return: logger
+    '''
+    level = default
+    if config_file is not None:
+        with open(config_file) as f:
+            level = json.load(f).get("python_log_level", default)
+
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+    logger.setLevel(LEVELS[level.lower()])
+    return logger
+
+
+class lazy:
+    '''
+    Defers a function call used to fill in a log message until the
+    message is formatted, so it is never made for suppressed messages.
+
+        logger.debug('\\tReceived %.2f from %s', v,
+                     lazy(h.helicsSubscriptionGetTarget, subid[j]))
+
+    :param func: Function returning the value to log
+    :param args: Arguments passed to func
+    '''
+    __slots__ = ("func", "args")
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+    def __str__(self):
+        return str(self.func(*self.args))
+
+    def __format__(self, format_spec):
+        return format(self.func(*self.args), format_spec)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Batched receive and reply for an endpoint that gets one kind of
+messagecodec message from many sources (e.g. the EV Controller, which
+gets an SOC message from every charging port). Rather than handling the
+messages one at a time, all the messages pending at the granted time are
+pulled into a single structured array
+
+    source (int32) | time (float64) | value
+
+so the federate can apply its control rule to the whole batch with NumPy
+and send the replies (encoded in one batch) in a single pass. Source
+endpoint names are mapped to small integer IDs the first time they are
+seen; the names are in Mailbox.sources.
+"""
+import helics as h
+import numpy as np
+
+import messagecodec
+
+
+class Mailbox:
+    '''
+    :param endpoint: Endpoint the messages arrive at
+    :param kind: messagecodec kind of the messages (e.g. messagecodec.SOC)
+    '''
+    def __init__(self, endpoint, kind):
+        self.endpoint = endpoint
+        self.kind = kind
+        self.sources = []  # source ID -> source endpoint name
+        self._source_ids = {}
+        self.dtype = np.dtype([("source", "i4"), ("time", "f8"),
+                               ("value", messagecodec.RECORDS[kind]["value"])])
+
+    def source_id(self, name):
+        '''
+        :param name: Source endpoint name
+        :return: Integer ID of the source (assigned if new)
+        '''
+        source = self._source_ids.get(name)
+        if source is None:
+            source = self._source_ids[name] = len(self.sources)
+            self.sources.append(name)
+        return source
+
+    def receive(self):
+        '''
+        Pulls in every message pending at the endpoint.
+
+        :return: Structured array with the source ID, time and decoded
+            value of each message, in order of arrival
+        '''
+        count = h.helicsEndpointPendingMessageCount(self.endpoint)
+        sources = np.empty(count, dtype=int)
+        times = np.empty(count)
+        payloads = []
+        for i in range(count):
+            msg = h.helicsEndpointGetMessage(self.endpoint)
+            sources[i] = self.source_id(h.helicsMessageGetOriginalSource(msg))
+            times[i] = h.helicsMessageGetTime(msg)
+            payloads.append(h.helicsMessageGetBytes(msg))
+
+        batch = np.empty(count, self.dtype)
+        batch["source"] = sources
+        batch["time"] = times
+        batch["value"] = messagecodec.decode(self.kind, payloads)
+        return batch
+
+    def reply(self, batch, kind, values):
+        '''
+        Sends a message back to the source of each message in the batch.
+
+        :param batch: Messages being replied to, as returned by receive()
+        :param kind: messagecodec kind of the replies
+        :param values: Value of each reply
+        :return: (none)
+        '''
+        send = h.helicsEndpointSendBytesTo
+        for source, message in zip(batch["source"],
+                                   messagecodec.encode(kind, values)):
+            send(self.endpoint, message, self.sources[source])
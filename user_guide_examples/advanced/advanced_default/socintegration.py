@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Integration of the battery SOC over a time step. The battery models treat
+the battery as an effective resistance R(soc) that rises as the battery
+fills, so with a charging voltage V held over the step
+
+    dsoc/dt = V^2 / (R(soc) * 3.6e6 * capacity)      (capacity in kWh)
+
+Stepping this with forward Euler and R frozen at the start of the step
+overestimates the charge added, by more the longer the step, which ties
+the accuracy of the SOC to the federate's period. Here instead:
+
+    - integrate_table() is exact for an effective resistance given as a
+      table interpolated with np.interp (linear between the breakpoints,
+      constant outside them). Since R is piecewise linear in soc,
+      R(soc) dsoc = V^2 / (3.6e6 * capacity) dt integrates to a quadratic
+      in soc on each piece, which is solved in closed form.
+    - integrate_adaptive() handles any other R(soc) (e.g. a Python
+      function) with adaptive sub-stepping: RK4 steps whose size is set
+      from step-doubling error estimates so the SOC error stays below a
+      given tolerance.
+
+Both can stop charging at a limiting SOC (1 for batteries that stop
+charging on their own when full) exactly when it is reached.
+"""
+import numpy as np
+
+
+def integrate_table(soc, voltage, dt, capacity, socs, effective_R, limit=np.inf):
+    '''
+    Exact SOC after charging for dt seconds, vectorized over batteries.
+
+    :param soc: SOC of each battery at the start of the step
+    :param voltage: Charging voltage applied to each battery (V)
+    :param dt: Length of the step (s)
+    :param capacity: Battery sizes (kWh)
+    :param socs: SOC breakpoints of the effective resistance table
+    :param effective_R: Effective resistance (ohms) at each breakpoint
+    :param limit: SOC at which the batteries stop charging
+    :return: Array of SOCs at the end of the step
+    '''
+    soc = np.array(soc, dtype=float)
+    socs = np.asarray(socs, dtype=float)
+    effective_R = np.asarray(effective_R, dtype=float)
+    # "Energy" to be absorbed: the integral of R dsoc over the step
+    energy = np.asarray(voltage, dtype=float) ** 2 * dt / (3.6e6 * np.asarray(capacity, dtype=float))
+    energy = np.broadcast_to(energy, soc.shape).copy()
+    energy[soc >= limit] = 0
+
+    # Pieces of R(soc): constant below the first breakpoint, linear
+    #   between breakpoints and constant above the last one
+    edges = np.r_[-np.inf, socs, np.inf]
+    slopes = np.r_[0, np.diff(effective_R) / np.diff(socs), 0]
+    for lo, hi, slope in zip(edges[:-1], edges[1:], slopes):
+        active = (energy > 0) & (soc >= lo) & (soc < hi)
+        if not active.any():
+            continue
+        s = soc[active]
+        e = energy[active]
+        r = np.interp(s, socs, effective_R)
+        end = min(hi, limit)
+        width = end - s
+        # Integral of R from s to the end of the piece
+        to_end = np.full(len(s), np.inf)
+        finite = np.isfinite(width)
+        to_end[finite] = r[finite] * width[finite] + slope / 2 * width[finite] ** 2
+        within = e < to_end
+        # Solving slope/2 x^2 + r x = e for the SOC increase x
+        with np.errstate(invalid="ignore"):
+            x = np.where(within, 2 * e / (r + np.sqrt(r ** 2 + 2 * slope * e)), width)
+        soc[active] = s + x
+        energy[active] = np.where(within, 0, e - to_end)
+        if end == limit:
+            energy[active & (soc >= limit)] = 0
+    return soc
+
+
+def integrate_adaptive(R, soc, voltage, dt, capacity, limit=np.inf, tol=1e-6):
+    '''
+    SOC of a single battery after charging for dt seconds, for any
+    effective resistance function.
+
+    :param R: Effective resistance (ohms) as a function of SOC
+    :param soc: SOC at the start of the step
+    :param voltage: Charging voltage (V)
+    :param dt: Length of the step (s)
+    :param capacity: Battery size (kWh)
+    :param limit: SOC at which the battery stops charging
+    :param tol: Largest SOC error allowed over the step
+    :return: SOC at the end of the step
+    '''
+    k = voltage ** 2 / (3.6e6 * capacity)
+    if k <= 0 or soc >= limit:
+        return soc
+
+    def rate(s):
+        return k / R(min(s, limit))
+
+    def rk4(s, h):
+        k1 = rate(s)
+        k2 = rate(s + h / 2 * k1)
+        k3 = rate(s + h / 2 * k2)
+        k4 = rate(s + h * k3)
+        return s + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+    t = 0
+    h = dt
+    while t < dt and soc < limit:
+        h = min(h, dt - t)
+        full = rk4(soc, h)
+        half = rk4(rk4(soc, h / 2), h / 2)
+        error = abs(half - full) / 15
+        if error <= tol * h / dt:
+            t += h
+            soc = half + (half - full) / 15
+            h = h * min(4, 0.9 * (tol * h / dt / max(error, 1e-300)) ** 0.2)
+        else:
+            h = h * max(0.1, 0.9 * (tol * h / dt / error) ** 0.25)
+    return min(soc, limit)
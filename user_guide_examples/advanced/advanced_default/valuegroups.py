@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Groups of HELICS value interfaces that are read or published together.
+The example federates keep their inputs and publications in dictionaries
+keyed by index (subid, pubid) and make one API call per interface per time
+step, along with extra calls to look up names purely for logging. These
+groups resolve the names once at registration and move all of the values
+in a single call to/from a preallocated NumPy array.
+
+Publication groups can also leave out values that haven't changed enough
+to matter since they were last published (a deadband); the subscribers
+keep the last value they received, so many mostly-static values cost the
+broker almost nothing. A maximum silence forces a value out every so
+often regardless.
+"""
+import helics as h
+import numpy as np
+
+
+class InputGroup:
+    '''
+    A set of inputs read as one array of doubles.
+
+    :param subid: Dictionary of input handles keyed by index, as built
+        after helicsCreateValueFederateFromConfig
+    '''
+    def __init__(self, subid):
+        self.handles = [subid[i] for i in range(len(subid))]
+        self.names = [h.helicsSubscriptionGetTarget(sub)
+                      for sub in self.handles]
+        self.values = np.zeros(len(self.handles))
+
+    def __len__(self):
+        return len(self.handles)
+
+    def get_double(self):
+        '''
+        Reads every input in the group.
+
+        :return: Array of input values (reused between calls)
+        '''
+        get = h.helicsInputGetDouble
+        self.values[:] = [get(sub) for sub in self.handles]
+        return self.values
+
+
+class PublicationGroup:
+    '''
+    A set of publications published from one array of doubles.
+
+    :param pubid: Dictionary of publication handles keyed by index, as
+        built after helicsCreateValueFederateFromConfig
+    :param abs_deadband: Value is not republished unless it has changed
+        by more than this since it was last published (scalar or one per
+        publication); 0 publishes only values that have changed
+    :param rel_deadband: As abs_deadband, relative to the last published
+        value; a value is published if it is outside both deadbands
+    :param max_silence: Longest time (s) between two publications of a
+        value; only applies if the time is passed to publish_double()
+    '''
+    def __init__(self, pubid, abs_deadband=None, rel_deadband=None,
+                 max_silence=None):
+        self.handles = [pubid[i] for i in range(len(pubid))]
+        self.names = [h.helicsPublicationGetName(pub)
+                      for pub in self.handles]
+        n = len(self.handles)
+        self.deadband = abs_deadband is not None or rel_deadband is not None
+        self.abs_deadband = np.broadcast_to(
+            0.0 if abs_deadband is None else abs_deadband, n).astype(float)
+        self.rel_deadband = np.broadcast_to(
+            0.0 if rel_deadband is None else rel_deadband, n).astype(float)
+        self.max_silence = max_silence
+        self.last_value = np.full(n, np.nan)
+        self.last_time = np.full(n, -np.inf)
+        self.offered = 0
+        self.sent = 0
+
+    def __len__(self):
+        return len(self.handles)
+
+    def publish_double(self, values, time=None):
+        '''
+        Publishes one value on each publication in the group, leaving out
+        the values within their deadband.
+
+        :param values: Sequence of values, one per publication
+        :param time: Current time (s), for max_silence
+        :return: Boolean mask of the values that were published
+        '''
+        values = np.asarray(values, dtype=float)
+        if self.deadband:
+            band = np.maximum(self.abs_deadband,
+                              self.rel_deadband * np.abs(self.last_value))
+            # Never published (NaN) counts as changed
+            send = ~(np.abs(values - self.last_value) <= band)
+            if self.max_silence is not None and time is not None:
+                send |= time - self.last_time >= self.max_silence
+        else:
+            send = np.ones(len(values), dtype=bool)
+
+        publish = h.helicsPublicationPublishDouble
+        handles = self.handles
+        for i in np.flatnonzero(send).tolist():
+            publish(handles[i], float(values[i]))
+        self.last_value[send] = values[send]
+        if time is not None:
+            self.last_time[send] = time
+        self.offered += len(values)
+        self.sent += int(np.count_nonzero(send))
+        return send
+
+    def suppression_ratio(self):
+        '''
+        :return: Fraction of the values offered to publish_double() that
+            were not sent
+        '''
+        if self.offered == 0:
+            return 0.0
+        return 1 - self.sent / self.offered
@@ -20,14 +20,13 @@ import numpy as np
 import matplotlib.pyplot as plt
 import sys
 from iterutils import *
+from socintegration import integrate_adaptive
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler())
 logger.setLevel(logging.DEBUG)
 
 
-feditr = FedItr(logger)
-
 def destroy_federate(fed):
     """
     As part of ending a HELICS co-simulation it is good housekeeping to
@@ -118,6 +117,8 @@ if __name__ == "__main__":
         pub_name = h.helicsPublicationGetName(pubid[i])
         logger.debug(f"\tRegistered publication---> {pub_name}")
 
+    feditr = FedItr(logger, fed, pubid, subid)
+
     ############## Some Setup #################################################
     epsilon = 1e-4
     batt_list = get_new_battery(pub_count)
@@ -130,7 +131,7 @@ if __name__ == "__main__":
     # initialize state
     vinit = 0
     charging_current = [current_update(vinit, current_soc[j]) for j in range(0, pub_count)] # initial state
-    charging_voltage = {}
+    charging_voltage = np.zeros(sub_count)
 
     hours = 24 * 5
     total_interval = int(60 * 60 * hours)
@@ -145,7 +146,7 @@ if __name__ == "__main__":
 
     ##############  INITIALIZATION  ##################################
     # initialize published currents
-    feditr.set_pub(fed, pubid, charging_current, "Battery", init=True)
+    feditr.set_pub(charging_current, "Battery", init=True)
 
     logger.info("=== Entering HELICS execution mode (Initialization)")
     itr = 0
@@ -159,9 +160,9 @@ if __name__ == "__main__":
             break
         
         # Get Subscriptions (the charging voltages)
-        feditr.get_sub(fed, subid, itr, charging_voltage, vinit, "Battery", "voltage")
+        charging_voltage = feditr.get_sub(itr, vinit, "Battery", "voltage")
         
-        error = feditr.check_error(charging_voltage)
+        error = feditr.check_error()
         logger.debug(f"\tError = {error}")
         if (error < epsilon) and (itr > 0):
             # no further iteration necessary
@@ -174,7 +175,7 @@ if __name__ == "__main__":
         for j in range(0, pub_count):
             # ----- update calculation --------
             # Calculate charging current
-            charging_current[j] = current_update(charging_voltage[j][0], current_soc[j])
+            charging_current[j] = current_update(charging_voltage[j], current_soc[j])
             logger.debug(f"\t\tBattery {j+1} charging current (A): {charging_current[j]:.2f}")
             try:
                 iinit[j][itr] = charging_current[j]
@@ -182,7 +183,7 @@ if __name__ == "__main__":
                 iinit[j].append(charging_current[j])
 
         # Publish updated current values (Publishing forces re-iteration!)
-        feditr.set_pub(fed, pubid, charging_current)
+        feditr.set_pub(charging_current)
         itr += 1
     
     state_plot(iinit, "advanced_iteration_current_init.png", 
@@ -194,7 +195,7 @@ if __name__ == "__main__":
     # As long as granted time is in the time range to be simulated...
     while grantedtime < total_interval:
         # Publication needed so we can actually iterate
-        feditr.set_pub(fed, pubid, charging_current)
+        feditr.set_pub(charging_current)
         
         # Time request for the next physical interval to be simulated
         requested_time = grantedtime + update_interval
@@ -202,7 +203,7 @@ if __name__ == "__main__":
         itr = 0
         itr_flag = h.helics_iteration_request_iterate_if_needed
         while True:
-            grantedtime, itr_state = feditr.request_time(fed, requested_time, itr, itr_flag)
+            grantedtime, itr_state = feditr.request_time(requested_time, itr, itr_flag)
             if itr_state == h.helics_iteration_result_next_step:
                 logger.debug("\tIteration complete!")
                 break
@@ -210,10 +211,10 @@ if __name__ == "__main__":
                 logger.debug("\tIterating")
             
             # Get Subscriptions (the charging voltages)
-            feditr.get_sub(fed, subid, itr, charging_voltage, vinit, "Battery", "voltage")
+            charging_voltage = feditr.get_sub(itr, vinit, "Battery", "voltage")
             
             # Check convergence
-            error = feditr.check_error(charging_voltage)
+            error = feditr.check_error()
             logger.debug(f"\tError = {error}")
             if (error < epsilon) and (itr > 0):
                 # no further iteration necessary
@@ -224,20 +225,24 @@ if __name__ == "__main__":
             
             logger.debug(f"\tCalculation update:")
             for j in range(0, pub_count):
-                charging_current[j] = current_update(charging_voltage[j][0], current_soc[j])
+                charging_current[j] = current_update(charging_voltage[j], current_soc[j])
                 logger.debug(f"\t\tBattery {j+1} Charging current (A): {charging_current[j]:.2f}")
             
             # Publish updated current values (Publishing forces re-iteration!)
-            feditr.set_pub(fed, pubid, charging_current)
+            feditr.set_pub(charging_current)
                 
             itr += 1
 
         # update state following convergence
         logger.debug(f"SOC Update time {grantedtime}")
         for j in range(0, pub_count):
-            # Update SOC
-            added_energy = (charging_current[j] * charging_voltage[j][0] * update_interval / 3600) / 1000
-            current_soc[j] = current_soc[j] + added_energy / batt_list[j]
+            # Update SOC, integrating over the interval with the effective
+            #   resistance following the SOC (adaptive sub-steps) rather
+            #   than frozen at its value at the start of the interval
+            new_soc = integrate_adaptive(effective_R, current_soc[j], charging_voltage[j],
+                                         update_interval, batt_list[j], limit=1)
+            added_energy = (new_soc - current_soc[j]) * batt_list[j]
+            current_soc[j] = new_soc
             logger.debug(f"\tBattery {j+1} - Added energy (kWh): {added_energy:.4f} - SOC: {current_soc[j]:.4f}")
             
             # Store SOC for later analysis/graphing
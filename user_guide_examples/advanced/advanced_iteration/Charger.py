@@ -26,7 +26,6 @@ logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler())
 logger.setLevel(logging.DEBUG)
 
-feditr = FedItr(logger)
 
 def destroy_federate(fed):
     """
@@ -99,34 +98,62 @@ def get_new_EV(numEVs):
 
     return numLvl1, numLvl2, numLvl3, listOfEVs
 
-def voltage_update(charger_rating, charging_current, charging_voltage=None, epsilon=1e-2, quiet=False):
+def voltage_update(charger_rating, charging_current, charging_voltage=None, epsilon=1e-2, quiet=False, proposal=np.nan, produced=None):
+    """
+    Bisection on the charging voltage to find the voltage giving the rated
+    charging current. The current narrows the bracket [Vmin, Vmax] around
+    the voltage that produced it: by default the last voltage, but as the
+    Battery iterates at the same time as the Charger it is the voltage
+    published one round before that (NaN: not known yet, nothing changes).
+    If a proposal for the next voltage (e.g. from a convergence
+    accelerator) is given it is used in place of the bisection midpoint,
+    but only while it is inside the bracket and the bracket has at least
+    halved since the last update, so it is never slower than bisection.
+    """
     if charging_voltage is None:
         quiet or logger.debug("\t\t--voltage_update type: init")
-        return {"V": charger_rating["Vr"], "Vmin": 0, "Vmax": charger_rating["Vr"]}
+        return {"V": charger_rating["Vr"], "Vmin": 0, "Vmax": charger_rating["Vr"], "W": np.inf}
+    V = charging_voltage["V"] if produced is None else produced
+    if np.isnan(V):
+        return charging_voltage
+    Vmin = charging_voltage["Vmin"]
+    Vmax = charging_voltage["Vmax"]
     if abs(charging_current - charger_rating["Ir"]) < epsilon:
         quiet or logger.debug("\t\t--voltage_update type: contant current")
-        # Constant current charging: do nothing
-        pass
-    elif (charging_current < charger_rating["Ir"]) and (charging_voltage["V"] < charger_rating["Vr"]):
-        quiet or logger.debug("\t\t--voltage_update type: voltage increase: V={:.2f} Vmax={:.2f}".format(charging_voltage["V"], charging_voltage["Vmax"]))
+        # Constant current charging: stay at the voltage that gave it
+        return dict(charging_voltage, V=V)
+    elif (charging_current < charger_rating["Ir"]) and (V < charger_rating["Vr"]):
+        quiet or logger.debug("\t\t--voltage_update type: voltage increase: V={:.2f} Vmax={:.2f}".format(V, Vmax))
         # increase voltage
-        charging_voltage= {"V": (charging_voltage["Vmax"] +  charging_voltage["V"])/2, 
-                            "Vmin": charging_voltage["V"], 
-                            "Vmax": charging_voltage["Vmax"]}
-    elif (charging_current < charger_rating["Ir"]) and (abs(charging_voltage["V"] - charger_rating["Vr"]) < epsilon):
+        Vmin = max(Vmin, V)
+    elif (charging_current < charger_rating["Ir"]) and (abs(V - charger_rating["Vr"]) < epsilon):
         quiet or logger.debug("\t--voltage_update type: contant voltage")
-        # constant voltage charging: do nothing
-        pass
+        # constant voltage charging: stay at the rated voltage
+        return dict(charging_voltage, V=V)
     elif charging_current > charger_rating["Ir"]:
-        quiet or logger.debug("\t\t--voltage_update type: voltage decrease: V={:.2f} Vmin={:.2f}".format(charging_voltage["V"], charging_voltage["Vmin"]))
+        quiet or logger.debug("\t\t--voltage_update type: voltage decrease: V={:.2f} Vmin={:.2f}".format(V, Vmin))
         # decrease voltage
-        charging_voltage = {"V": (charging_voltage["V"] + charging_voltage["Vmin"])/2,
-                                "Vmin": charging_voltage["Vmin"],
-                                "Vmax": charging_voltage["V"]}
+        Vmax = min(Vmax, V)
     else:
         raise ValueError("voltage_update: inputs do not match any of the expected cases")
-        
-    return charging_voltage
+
+    width = Vmax - Vmin
+    if Vmin < proposal < Vmax and width <= charging_voltage["W"] / 2:
+        V = proposal
+    else:
+        V = (Vmin + Vmax) / 2
+    return {"V": V, "Vmin": Vmin, "Vmax": Vmax, "W": width}
+
+def propose_voltage(accelerator, charger_ratings, produced, charging_current):
+    """
+    Passes the voltages that produced the charging currents and the
+    resulting error in the current (measured - rated) to the convergence
+    accelerator.
+
+    :return: Proposed next charging voltage for each EV (NaN: no proposal)
+    """
+    residual = charging_current - np.array([r["Ir"] for r in charger_ratings])
+    return accelerator.propose(produced, residual)
 
 if __name__ == "__main__":
     np.random.seed(1490)
@@ -156,6 +183,8 @@ if __name__ == "__main__":
         pub_name = h.helicsPublicationGetName(pubid[i])
         logger.debug(f"\tRegistered publication---> {pub_name}")
 
+    feditr = FedItr(logger, fed, pubid, subid)
+
     ############## Some Setup #################################################
     # Generate an initial fleet of EVs, one for each previously defined
     #   handle. This gives each EV a unique link to the EV controller
@@ -164,6 +193,9 @@ if __name__ == "__main__":
     charger_ratings = get_charger_ratings(EVlist)
 
     epsilon = 1e-2
+    # Proposes the next charging voltages from the iterate history; use
+    #   Accelerator(pub_count) for plain bisection
+    accelerator = Secant(pub_count)
 
     hours = 24 * 5
     total_interval = int(60 * 60 * hours)
@@ -173,7 +205,7 @@ if __name__ == "__main__":
     #initialize state
     iinit = 0
     charging_voltage = [voltage_update(charger_ratings[j], iinit, quiet=True) for j in range(0, pub_count)]
-    charging_current = {}
+    charging_current = np.zeros(sub_count)
 
     # Data collection lists
     time_sim = []
@@ -182,9 +214,14 @@ if __name__ == "__main__":
     vinit = {j: [] for j in range(0, pub_count)}
     ##############  INITIALIZATION  ##################################
     # initialize published voltaged
-    feditr.set_pub(fed, pubid, [x["V"] for x in charging_voltage], "EV", init=True)
+    feditr.set_pub([x["V"] for x in charging_voltage], "EV", init=True)
     
     logger.info("=== Entering HELICS execution mode (Initialization)")
+    # The Battery reads the voltages published in the last round while the
+    #   Charger reads the currents it published, so the currents the
+    #   Charger reads come from the voltages published the round before;
+    #   the voltages behind the first currents of a step aren't known
+    sent = np.full(pub_count, np.nan)
     itr = 0
     itr_flag = h.helics_iteration_request_iterate_if_needed
     while True:
@@ -196,9 +233,10 @@ if __name__ == "__main__":
             break
         
         # Get Subscriptions (the charging currents)
-        feditr.get_sub(fed, subid, itr, charging_current, iinit, "EV", "current")
+        charging_current = feditr.get_sub(itr, iinit, "EV", "current")
+        produced, sent = sent, np.array([x["V"] for x in charging_voltage])
 
-        error = feditr.check_error(charging_current)
+        error = feditr.check_error()
         logger.debug(f"\tError = {error}")
         if (error < epsilon) and (itr > 0):
             # no further iteration necessary
@@ -208,17 +246,19 @@ if __name__ == "__main__":
         
         # Calculate new voltages based on received currents
         logger.debug("\tCalculation Update:")
+        proposal = propose_voltage(accelerator, charger_ratings, produced, charging_current)
         for j in range(0, pub_count):
             # ----- update calculation --------
             # Calculate charging voltage
-            charging_voltage[j] = voltage_update(charger_ratings[j], charging_current[j][0], charging_voltage[j])
+            charging_voltage[j] = voltage_update(charger_ratings[j], charging_current[j], charging_voltage[j],
+                                                 proposal=proposal[j], produced=produced[j])
             logger.debug(f"\t\tEV {j+1} charging voltage (V): " "{:.2f}".format(charging_voltage[j]["V"]))
             try:
                 vinit[j][itr] = charging_voltage[j]["V"]
             except IndexError:
                 vinit[j].append(charging_voltage[j]["V"])
         # Publish updated voltage values (Publishing forces re-iteration!)
-        feditr.set_pub(fed, pubid, [x["V"] for x in charging_voltage])
+        feditr.set_pub([x["V"] for x in charging_voltage])
         itr += 1
     
     state_plot(vinit, "advanced_iteration_voltage_init.png", 
@@ -230,7 +270,7 @@ if __name__ == "__main__":
     # As long as granted time is in the time range to be simulated...
     while grantedtime < total_interval:
         # Publication needed so we can actually iterate
-        feditr.set_pub(fed, pubid, [x["V"] for x in charging_voltage])
+        feditr.set_pub([x["V"] for x in charging_voltage])
 
         # Time request for the next physical interval to be simulated
         requested_time = grantedtime + update_interval
@@ -239,11 +279,14 @@ if __name__ == "__main__":
         for j in range(0, pub_count):
             charging_voltage[j]["Vmin"] = 0
             charging_voltage[j]["Vmax"] = charger_ratings[j]["Vr"]
+            charging_voltage[j]["W"] = np.inf
+        accelerator.reset()
+        sent = np.full(pub_count, np.nan)
 
         itr = 0
         itr_flag = h.helics_iteration_request_iterate_if_needed
         while True:
-            grantedtime, itr_state = feditr.request_time(fed, requested_time, itr, itr_flag)
+            grantedtime, itr_state = feditr.request_time(requested_time, itr, itr_flag)
             if itr_state == h.helics_iteration_result_next_step:
                 logger.debug("\tIteration complete!")
                 break
@@ -251,10 +294,11 @@ if __name__ == "__main__":
                 logger.debug("\tIterating")
             
             # Get Subscriptions (the charging currents)
-            feditr.get_sub(fed, subid, itr, charging_current, iinit, "EV", "current")
+            charging_current = feditr.get_sub(itr, iinit, "EV", "current")
+            produced, sent = sent, np.array([x["V"] for x in charging_voltage])
             
             # Check convergence
-            error = feditr.check_error(charging_current)
+            error = feditr.check_error()
             logger.debug(f"\tError = {error}")
             if (error < epsilon) and (itr > 0):
                 # no further iteration necessary
@@ -263,13 +307,15 @@ if __name__ == "__main__":
                 pass
             
             logger.debug("\tCalculation Update:")
+            proposal = propose_voltage(accelerator, charger_ratings, produced, charging_current)
             for j in range(0, pub_count):
                 # Calculate charging voltage
-                charging_voltage[j] = voltage_update(charger_ratings[j], charging_current[j][0], charging_voltage[j])
+                charging_voltage[j] = voltage_update(charger_ratings[j], charging_current[j], charging_voltage[j],
+                                                     proposal=proposal[j], produced=produced[j])
                 logger.debug(f"\t\tEV {j+1} charging voltage (V): " "{:.2f}".format(charging_voltage[j]["V"]))
 
             # Publish updated voltage values (Publishing forces re-iteration!)
-            feditr.set_pub(fed, pubid, [x["V"] for x in charging_voltage])
+            feditr.set_pub([x["V"] for x in charging_voltage])
             
             itr += 1
 
@@ -279,7 +325,7 @@ if __name__ == "__main__":
         total_power = 0
         for j in range(0, pub_count):
             voltage_out[j].append(charging_voltage[j]["V"])
-            total_power += charging_current[j][0]*charging_voltage[j]["V"]/1000
+            total_power += charging_current[j]*charging_voltage[j]["V"]/1000
         logger.debug(f"\tTotal Power Draw {total_power:0.2f} kW")
 
         # Data collection vectors
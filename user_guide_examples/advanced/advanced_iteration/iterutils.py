@@ -7,57 +7,163 @@ iteration.
 The are grouped here for readability, reproduceability and to ensure uniform alteration.
 """
 import helics as h
+import logging
 import matplotlib.pyplot as plt
+import numpy as np
+
+
+class Accelerator:
+    """
+    Base class of the convergence accelerators. Each iteration the
+    federate passes in values it published and the residual they produced
+    (zero when converged); the accelerator uses the history of these
+    iterates to propose the next values to publish. When federates iterate
+    at the same time the residual read in a round comes from the values
+    published the round before last, and those are what must be passed.
+    A proposal of NaN means the accelerator has nothing to offer for
+    that value and the federate should fall back on its own update.
+    """
+    def __init__(self, n):
+        self.n = n
+        self.reset()
+
+    def reset(self):
+        """Forgets the iterate history (e.g. at the start of a time step)."""
+        pass
+
+    def propose(self, x, f):
+        return np.full(self.n, np.nan)
+
+
+class Secant(Accelerator):
+    """
+    Proposes the root of the line through the last two iterates of each
+    value (the secant method). For a residual that is linear in the value,
+    as with a battery with a fixed effective resistance, this lands on the
+    answer from the second iterate on; in general it converges
+    superlinearly, rather than gaining one bit per iteration as bisection
+    does.
+    """
+    def reset(self):
+        self.x = np.full((2, self.n), np.nan)
+        self.f = np.full((2, self.n), np.nan)
+
+    def propose(self, x, f):
+        """
+        :param x: Values published in the last iteration
+        :param f: Residuals resulting from those values
+        :return: Proposed next values (NaN where there is no proposal)
+        """
+        self.x[1] = self.x[0]
+        self.f[1] = self.f[0]
+        self.x[0] = x
+        self.f[0] = f
+        df = self.f[0] - self.f[1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            proposal = self.x[0] - self.f[0] * (self.x[0] - self.x[1]) / df
+        proposal[~np.isfinite(proposal)] = np.nan
+        return proposal
+
+
 class FedItr:
-    def __init__(self, logger):
+    """
+    Iteration bookkeeping for a federate. The publication and input handles
+    (and their names, for logging) are cached when the object is created,
+    and the values received on the inputs are kept in a NumPy ring buffer
+    of n_inputs x history so the convergence check is a single vectorized
+    norm over all inputs, however many there are.
+
+    :param logger: Logger used for the iteration diagnostics
+    :param fed: HELICS federate
+    :param pubid: Publication handles, indexed 0..pub_count-1
+    :param subid: Input handles, indexed 0..sub_count-1
+    :param history: Number of iterates of each input to keep (at least 2)
+    :param norm: Norm of the change in the inputs used as the iteration
+        error; 1 (sum of absolute changes), 2, or np.inf (largest change)
+    """
+    def __init__(self, logger, fed, pubid, subid, history=2, norm=1):
+        if history < 2:
+            raise ValueError("FedItr: history must be at least 2")
+        if norm not in (1, 2, np.inf):
+            raise ValueError(f"FedItr: unsupported norm {norm}")
         self.logger = logger
+        self.fed = fed
+        self.pubid = [pubid[j] for j in range(len(pubid))]
+        self.subid = [subid[j] for j in range(len(subid))]
+        self.pub_count = len(self.pubid)
+        self.sub_count = len(self.subid)
+        self.pub_names = [h.helicsPublicationGetName(pub) for pub in self.pubid]
+        self.sub_targets = [h.helicsSubscriptionGetTarget(sub) for sub in self.subid]
+        self.norm = norm
+        self.history = np.zeros((self.sub_count, history))
+        self.head = 0
+
+    @property
+    def latest(self):
+        """Values received on the inputs in the latest iteration"""
+        return self.history[:, self.head]
+
+    @property
+    def previous(self):
+        """Values received on the inputs in the iteration before the latest"""
+        return self.history[:, self.head - 1]
 
-    def check_error(self, dState):
-        return sum([abs(vals[0] - vals[1]) for vals in dState.values()])
+    def check_error(self):
+        return np.linalg.norm(self.latest - self.previous, self.norm)
 
-    def request_time(self, fed, requested_time, itr, itr_flag, iterative_mode=True):
+    def request_time(self, requested_time, itr, itr_flag, iterative_mode=True):
         if itr == 0:
             s = "=====================\n"
         else:
             s = "---------------------\n"
         if not iterative_mode:
-            grantedtime = h.helicsFederateRequestTime(fed, requested_time)
+            grantedtime = h.helicsFederateRequestTime(self.fed, requested_time)
             self.logger.debug(f"{s}Requested time {requested_time} - Granted time {grantedtime}")
             return grantedtime
         else:
-            grantedtime, itr_state = h.helicsFederateRequestTimeIterative(fed,requested_time,itr_flag)
+            grantedtime, itr_state = h.helicsFederateRequestTimeIterative(self.fed,requested_time,itr_flag)
             self.logger.debug(f"{s}Requested time: {requested_time} - Granted time: {grantedtime} - itr: {itr} - itr request: {ireq(itr_flag)} - itr status: {ires(itr_state)}")
             return grantedtime, itr_state
 
-    def set_pub(self, fed, pubid, pubvals, nametyp=None, init=False):
+    def set_pub(self, pubvals, nametyp=None, init=False):
+        debug = self.logger.isEnabledFor(logging.DEBUG)
         if init:
             self.logger.info("=== Entering HELICS Initialization mode")
-            h.helicsFederateEnterInitializingMode(fed)
-        else:
-            self.logger.debug(f"\tPublications: (helics mode: {fedstate(h.helicsFederateGetState(fed))})")
-        pub_count = h.helicsFederateGetPublicationCount(fed)
-        for j in range(0, pub_count):
-            h.helicsPublicationPublishDouble(pubid[j], pubvals[j])
+            h.helicsFederateEnterInitializingMode(self.fed)
+        elif debug:
+            self.logger.debug(f"\tPublications: (helics mode: {fedstate(h.helicsFederateGetState(self.fed))})")
+        for j in range(0, self.pub_count):
+            h.helicsPublicationPublishDouble(self.pubid[j], pubvals[j])
+            if not debug:
+                continue
             if init:
-                self.logger.debug(f"\t{nametyp} {j+1} published {h.helicsPublicationGetName(pubid[j])} with value " 
+                self.logger.debug(f"\t{nametyp} {j+1} published {self.pub_names[j]} with value " 
                     "{:.2f}".format(pubvals[j]))
             else:
-                self.logger.debug(f"\t\tPublished {h.helicsPublicationGetName(pubid[j])} with value " 
+                self.logger.debug(f"\t\tPublished {self.pub_names[j]} with value " 
                     "{:.2f}".format(pubvals[j]))
 
-    def get_sub(self, fed, subid, itr, valarray, valinit, nametyp, proptyp):
+    def get_sub(self, itr, valinit, nametyp, proptyp):
+        """
+        Reads all the inputs into the next slot of the ring buffer. On the
+        first iteration of a time step the history is reset to valinit.
+
+        :return: Array of the values just received (a copy)
+        """
+        debug = self.logger.isEnabledFor(logging.DEBUG)
         self.logger.debug("\tSubscriptsion:")
-        sub_count = h.helicsFederateGetInputCount(fed)
-        for j in range(0, sub_count):
-            x = h.helicsInputGetDouble((subid[j]))
-            self.logger.debug(f"\t\t{nametyp} {j+1} received {proptyp} {x:.2f}" 
-                        f" from input {h.helicsSubscriptionGetTarget(subid[j])}")
-            if itr == 0:
-                valarray[j] = [valinit] * 2
-            else:
-                valarray[j].insert(0, valarray[j].pop())
-            valarray[j][0] = x
-            self.logger.debug(f"\t\t\t{proptyp} array={valarray[j]}")
+        if itr == 0:
+            self.history[:] = valinit
+        self.head = (self.head + 1) % self.history.shape[1]
+        x = self.history[:, self.head]
+        for j in range(0, self.sub_count):
+            x[j] = h.helicsInputGetDouble(self.subid[j])
+        if debug:
+            for j in range(0, self.sub_count):
+                self.logger.debug(f"\t\t{nametyp} {j+1} received {proptyp} {x[j]:.2f}" 
+                            f" from input {self.sub_targets[j]}")
+                self.logger.debug(f"\t\t\t{proptyp} array=[{x[j]:.2f}, {self.previous[j]:.2f}]")
+        return x.copy()
 
 
 def ires(n):
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Checks of the Charger's voltage iteration against a model of its exchange
+with the Battery. Both federates iterate at the same time: in each round
+each one reads what the other published in the round before, and the time
+step ends once neither of them publishes.
+"""
+import numpy as np
+
+from Battery import current_update, effective_R
+from Charger import propose_voltage, voltage_update
+from iterutils import Accelerator, Secant
+
+
+def iterate_step(soc, rating, charging_voltage, charging_current, accelerator, max_rounds=200):
+    '''
+    One time step of the exchange for a single EV, following the
+    federates' main loops.
+
+    :return: Number of rounds, final voltage state and final current
+    '''
+    charging_voltage = dict(charging_voltage, Vmin=0, Vmax=rating["Vr"], W=np.inf)
+    accelerator.reset()
+    sent = np.full(1, np.nan)
+    # Values published before the first round
+    voltage_in, current_in = charging_voltage["V"], charging_current
+    last_voltage_in = last_current_in = 0
+    for itr in range(max_rounds):
+        new_voltage = new_current = None
+        # Battery
+        if itr == 0 or abs(voltage_in - last_voltage_in) >= 1e-4:
+            new_current = current_update(voltage_in, soc)
+        last_voltage_in = voltage_in
+        # Charger
+        produced, sent = sent, np.array([charging_voltage["V"]])
+        if itr == 0 or abs(current_in - last_current_in) >= 1e-2:
+            proposal = propose_voltage(accelerator, [rating], produced, np.array([current_in]))
+            charging_voltage = voltage_update(rating, current_in, charging_voltage, quiet=True,
+                                              proposal=proposal[0], produced=produced[0])
+            new_voltage = charging_voltage["V"]
+        last_current_in = current_in
+
+        if new_voltage is None and new_current is None:
+            return itr + 1, charging_voltage, charging_current
+        if new_voltage is not None:
+            voltage_in = new_voltage
+        if new_current is not None:
+            current_in = charging_current = new_current
+    raise RuntimeError("iteration did not converge")
+
+
+def charge(accelerator_class, seed, steps=300, dt=60):
+    '''
+    Charges one EV for a number of time steps.
+
+    :return: Rounds taken in each current-limited step, and the largest
+        error in the settled current
+    '''
+    rng = np.random.default_rng(seed)
+    level = rng.choice([2, 3])
+    rating = {"Vr": [120, 240, 630][level - 1], "Ir": [15, 30, 104][level - 1]}
+    soc = rng.integers(0, 60) / 100
+    capacity = rng.choice([25, 62, 100])
+    accelerator = accelerator_class(1)
+    charging_voltage = voltage_update(rating, 0, quiet=True)
+    charging_current = current_update(0, soc)
+    rounds, error = [], 0
+    for _ in range(steps):
+        n, charging_voltage, charging_current = iterate_step(
+            soc, rating, charging_voltage, charging_current, accelerator)
+        expected = min(rating["Ir"], rating["Vr"] / effective_R(soc)) if soc < 1 else 0
+        error = max(error, abs(charging_current - expected))
+        if expected == rating["Ir"]:
+            rounds.append(n)
+        soc = min(1, soc + charging_voltage["V"] * charging_current * dt / 3.6e6 / capacity)
+    return rounds, error
+
+
+def test_secant_takes_fewer_rounds_than_bisection():
+    bisection, secant = [], []
+    for seed in range(20):
+        rounds, error = charge(Accelerator, seed)
+        assert error < 1e-2
+        bisection += rounds
+        rounds, error = charge(Secant, seed)
+        assert error < 1e-2
+        secant += rounds
+    assert len(bisection) > 0
+    print(f"rounds per current-limited step: bisection {np.mean(bisection):.2f}, "
+          f"secant {np.mean(secant):.2f}")
+    assert np.mean(secant) < 0.5 * np.mean(bisection)
+    assert max(secant) <= max(bisection)
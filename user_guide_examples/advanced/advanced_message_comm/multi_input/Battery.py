@@ -28,6 +28,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 import sys
 
+from inputsnapshot import InputSnapshot
+
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler())
@@ -140,6 +142,11 @@ if __name__ == "__main__":
 
 
 
+    # The single charging voltage is read once per granted time and feeds
+    #   all the batteries
+    inputs = InputSnapshot(subid, feeds={0: range(pub_count)})
+    charging_current = np.zeros(pub_count)
+
     # Data collection lists
     time_sim = []
     total_current = []
@@ -154,15 +161,23 @@ if __name__ == "__main__":
         grantedtime = h.helicsFederateRequestTime (fed, requested_time)
         logger.debug(f'Granted time {grantedtime}')
 
+        # Get the applied charging voltage from the EV
+        charging_voltage = inputs.read()[0]
+        logger.debug(f'Received voltage {charging_voltage:.2f} from input'
+                     f' {inputs.names[0]} (updated: {inputs.updated[0]})')
+        dirty = inputs.dirty()
+
         # Iterating over publications in this case since this example
         #  uses only one charging voltage for all five batteries
         for j in range(0,pub_count):
             logger.debug(f'Battery {j+1} time {grantedtime}')
 
-            # Get the applied charging voltage from the EV
-            charging_voltage = h.helicsInputGetDouble((subid[0]))
-            logger.debug(f'\tReceived voltage {charging_voltage:.2f} from input'
-                         f' {h.helicsSubscriptionGetTarget(subid[0])}')
+            # A full battery that isn't drawing current stays that way
+            #  until its voltage changes; nothing to recompute or publish
+            if j not in dirty and current_soc[j] >= 1 and charging_current[j] == 0:
+                logger.debug('\tFull, no change')
+                soc[pubid[j]].append(float(current_soc[j]))
+                continue
 
 
             # Calculate charging current and update SOC
@@ -171,11 +186,11 @@ if __name__ == "__main__":
             # If battery is full assume its stops charging on its own
             #  and the charging current goes to zero.
             if current_soc[j] >= 1:
-                charging_current = 0;
+                charging_current[j] = 0
             else:
-                charging_current = charging_voltage / R
-            logger.debug(f'\tCharging current (A): {charging_current:.2f}')
-            added_energy = (charging_current * charging_voltage * \
+                charging_current[j] = charging_voltage / R
+            logger.debug(f'\tCharging current (A): {charging_current[j]:.2f}')
+            added_energy = (charging_current[j] * charging_voltage * \
                            update_interval/3600) / 1000
             logger.debug(f'\tAdded energy (kWh): {added_energy:.4f}')
             current_soc[j] = current_soc[j] + added_energy / batt_list[j]
@@ -187,9 +202,9 @@ if __name__ == "__main__":
 
 
             # Publish out charging current
-            h.helicsPublicationPublishDouble(pubid[j], charging_current)
+            h.helicsPublicationPublishDouble(pubid[j], charging_current[j])
             logger.debug(f'\tPublished {pub_name[j]} with value '
-                         f'{charging_current:.2f}')
+                         f'{charging_current[j]:.2f}')
 
             # Store SOC for later analysis/graphing
             if pubid[j] not in soc:
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Per-time-step snapshot of a federate's inputs. Each input is read once per
+granted time, and only if HELICS flags it as updated since the last read;
+the federate's model then works from the snapshot rather than calling
+helicsInputGetDouble() wherever it needs a value. Along with the values,
+the snapshot records which inputs were updated and, through a map of
+which model entities (e.g. batteries) each input feeds, which entities
+have new inputs (the "dirty" set) so the model can skip recomputing the
+ones where nothing has changed. By default the inputs are set to only
+count as updated when their value changes, so a publisher republishing
+the same value every step doesn't make everything dirty.
+"""
+import helics as h
+import numpy as np
+
+
+class InputSnapshot:
+    '''
+    :param subid: Dictionary of input handles keyed by index
+    :param feeds: For each input index, the indices of the model entities
+        it feeds; by default input i feeds entity i
+    :param only_update_on_change: Whether an input republished with the
+        same value counts as unchanged
+    '''
+    def __init__(self, subid, feeds=None, only_update_on_change=True):
+        self.handles = [subid[i] for i in range(len(subid))]
+        if only_update_on_change:
+            for sub in self.handles:
+                h.helicsInputSetOption(sub, h.HELICS_HANDLE_OPTION_ONLY_UPDATE_ON_CHANGE, 1)
+        self.names = [h.helicsSubscriptionGetTarget(sub) for sub in self.handles]
+        if feeds is None:
+            feeds = {i: [i] for i in range(len(self.handles))}
+        self.feeds = {i: list(feeds[i]) for i in range(len(self.handles))}
+        self.values = np.zeros(len(self.handles))
+        self.updated = np.zeros(len(self.handles), dtype=bool)
+        self._read = False
+
+    def read(self):
+        '''
+        Takes the snapshot for the granted time. On the first call every
+        input counts as updated.
+
+        :return: Array of input values (reused between calls)
+        '''
+        for i, sub in enumerate(self.handles):
+            self.updated[i] = not self._read or h.helicsInputIsUpdated(sub)
+            if self.updated[i]:
+                self.values[i] = h.helicsInputGetDouble(sub)
+        self._read = True
+        return self.values
+
+    def dirty(self):
+        '''
+        :return: Set of the entities fed by an input updated in this snapshot
+        '''
+        dirty = set()
+        for i in np.flatnonzero(self.updated).tolist():
+            dirty.update(self.feeds[i])
+        return dirty
@@ -24,6 +24,8 @@ import json
 import pprint
 import time
 
+from graphindex import DataFlowGraph, wait_for_publications
+
 # Setting up pretty printing, mostly for debugging.
 pp = pprint.PrettyPrinter(indent=4)
 
@@ -80,67 +82,39 @@ def get_new_battery(numBattery):
 
     return listOfBatts
 
-def eval_data_flow_graph(fed):
-    query = h.helicsCreateQuery("broker", "data_flow_graph")
-    graph = h.helicsQueryExecute(query, fed)
+def eval_data_flow_graph(fed, index, target="broker"):
+    '''
+    Queries the data flow graph, adds it to the index and logs a simplified
+    human-readable version of the subscriptions of the federates queried.
+
+    :param fed: Federate running the query
+    :param index: DataFlowGraph the query result is added to
+    :param target: Query target; "broker" for the whole federation or the
+        name of a single federate to refresh just that federate
+    :return: Query result
+    '''
+    graph = index.query(fed, target)
     #logger.debug(f'Data flow graph: {data_flow_graph}')
 
-    # Processing data flow graph to confirm correct configuration
-    handle_lut = {}
-    federates_lut = {}
-    for core in graph['cores']:
-        # Build handle and federate look-up table
-        #   The data flow graph that is produced identifies input sources
-        #   by "handle" an index for all handles in a given federate. For
-        #   human comprehension, I'm building a look-up table that matches
-        #   handle ID and handle name. Because the handle index is federate
-        #   specific I'm going to build a unique key for the look-up table
-        #   Formatted <federate Id>-<handle ID>
-        #
-        #   I'll build a similar look-up table for federate IDs and names
-        #   but the federate IDs are globally unique so it will be simpler
-
-        # Assume only one federate per core, index "0". Since I built this
-        #   federation I know this is true and in most federations it
-        #   will also be true.
-        federates_lut[core['federates'][0]['id']] = core['federates'][0][
-            'name']
-
-        # Endpoints, inputs, and publications all are considered handles
-        #   BUT only endpoints and publications contain the mapping
-        #   between handle ID and handle name
-        if 'endpoints' in core['federates'][0]:
-            for ep in core['federates'][0]['endpoints']:
-                key = f'{ep["federate"]}-{ep["handle"]}'
-                handle_lut[key] = ep['key']
-        if 'publications' in core['federates'][0]:
-            for pub in core['federates'][0]['publications']:
-                key = f'{pub["federate"]}-{pub["handle"]}'
-                handle_lut[key] = pub['key']
-
-    # logger.debug(f'handle_lut: \n{pp.pformat(handle_lut)}')
-
-    # Now that I've got the look-up tables in place, re-traversing the
-    #   graph to log out a simplified human-readable version
-    for core in graph['cores']:
-        if 'inputs' in core['federates'][0]:
-            logger.debug(f'Federate {core["federates"][0]["name"]}'
-                         f' (with id {core["federates"][0]["id"]})'
+    if target == "broker":
+        fed_ids = list(index.federates)
+    else:
+        fed_ids = [index.federate_ids[target]]
+    for fed_id in fed_ids:
+        if index.inputs[fed_id]:
+            logger.debug(f'Federate {index.federates[fed_id]}'
+                         f' (with id {fed_id})'
                          f' has the following subscriptions:')
-            for input in core['federates'][0]['inputs']:
-                # Assume only no more than one source per input, index "0"
-                #   This is usually true but multi-source inputs are a thing.
-                if "sources" in input:
-                    source_key = f'{input["sources"][0]["federate"]}-' \
-                                 f'{input["sources"][0]["handle"]}'
-                    logger.debug(f'\t{handle_lut[source_key]} from federate'
-                                 f' {federates_lut[input["sources"][0]["federate"]]}')
-                else:
-                    # Input has no defined source
-                    logger.warning(f'\tSubscription found with no source '
-                                   f'defined')
-
-    return graph, federates_lut, handle_lut
+        for input in index.inputs[fed_id]:
+            sources = index.source_keys(input)
+            if not sources:
+                # Input has no defined source
+                logger.warning(f'\tSubscription found with no source '
+                               f'defined')
+            for key, source_federate in sources:
+                logger.debug(f'\t{key} from federate {source_federate}')
+
+    return graph
 
 
 if __name__ == "__main__":
@@ -174,25 +148,17 @@ if __name__ == "__main__":
         logger.debug(f'\tRegistered publication---> {pub_name[i]}')
 
     # Setting up for dynamic configuration
-    # Pausing to ensure the other federates have registered so that we
-    #   can look at the available publications and subscribe to the
-    #   correct ones
-    sleep_time = 5
-    logger.debug(f'Sleeping for {sleep_time} seconds')
-    time.sleep(sleep_time)
-    logger.debug('Pre-configure data-flow graph query.')
-    graph, federates_lut, handle_lut = eval_data_flow_graph(fed)
-
-    #logger.debug(pp.pformat(graph))
-
-    # Looking at the graph to find the publications to which we need to
-    #   subscribe
-    for core in graph['cores']:
-        if core['federates'][0]['name'] == 'Charger':
-            for pub in core['federates'][0]['publications']:
-                key = pub['key']
-                sub = h.helicsFederateRegisterSubscription(fed, key)
-                logger.debug(f'Added subscription {key}')
+    # Waiting until the Charger has registered its publications (one
+    #   charging voltage per battery) so that we can subscribe to them
+    logger.debug('Waiting for the Charger publications')
+    start = time.monotonic()
+    charger_keys = wait_for_publications(fed, 'Charger', pub_count)
+    logger.debug(f'Found {len(charger_keys)} Charger publications after '
+                 f'{time.monotonic() - start:.2f} seconds')
+
+    for key in charger_keys:
+        sub = h.helicsFederateRegisterSubscription(fed, key)
+        logger.debug(f'Added subscription {key}')
 
     ##############  Entering Init Mode  ##################################
     h.helicsFederateEnterInitializingMode(fed)
@@ -201,10 +167,13 @@ if __name__ == "__main__":
     #  of the federation as execution of the co-simulation has not begun.
 
     # The data flow graph can be a time-intensive query for large
-    #   federations
+    #   federations so it is only run once, now that the subscriptions
+    #   are in place; later changes can be picked up by re-querying just
+    #   the federates concerned.
     # Verifying dynamic configuration worked.
     logger.debug('Post-configure data-flow graph query.')
-    graph, federates_lut, handle_lut = eval_data_flow_graph(fed)
+    index = DataFlowGraph()
+    graph = eval_data_flow_graph(fed, index)
     # logger.debug(pp.pformat(graph))
     sub_count = h.helicsFederateGetInputCount(fed)
     logger.debug(f'Number of subscriptions: {sub_count}')
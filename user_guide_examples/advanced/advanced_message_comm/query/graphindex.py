@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Index of the HELICS "data_flow_graph" query result. The query result is a
+tree (broker -> cores -> federates -> interfaces) in which inputs refer to
+their sources only by federate ID and handle index, so answering "who
+publishes what" or "where does this input get its data" means walking the
+whole tree. Here the tree is walked once and flattened into look-up tables
+and an adjacency structure (source handle -> subscribing inputs) so those
+questions are dictionary look-ups.
+
+Cores with any number of federates, sub-brokers and inputs with any number
+of sources are handled. The data flow graph query is expensive for large
+federations, so after the first full query the index can be refreshed
+incrementally by querying just the federates that have changed (e.g. after
+adding subscriptions); their entries are replaced and the rest of the
+index is left as is.
+
+wait_for_publications() is a readiness barrier for dynamic configuration:
+rather than sleeping for a fixed time and hoping the other federates have
+registered their interfaces by then, it polls the (cheap) "publications"
+query on the federate of interest, backing off exponentially, until the
+expected publications have appeared.
+"""
+import time
+
+import helics as h
+
+
+# Keys of the interface lists in a federate's query result
+INTERFACES = ("publications", "inputs", "endpoints")
+
+class DataFlowGraph:
+    '''
+    Look-up tables built from data_flow_graph query results. Handles are
+    identified by (federate ID, handle index) tuples.
+
+    :param graph: Optional query result to index straight away
+    '''
+    def __init__(self, graph=None):
+        self.federates = {}  # federate ID -> federate name
+        self.federate_ids = {}  # federate name -> federate ID
+        self.handles = {}  # handle -> key (name) of publication or endpoint
+        self.publications = {}  # federate ID -> list of publication handles
+        self.endpoints = {}  # federate ID -> list of endpoint handles
+        self.inputs = {}  # federate ID -> list of input handles
+        self.sources = {}  # input handle -> list of source handles
+        self.subscribers = {}  # source handle -> set of input handles
+        if graph is not None:
+            self.update(graph)
+
+    def query(self, fed, target="broker"):
+        '''
+        Runs a data_flow_graph query and adds the result to the index.
+        Querying a single federate (by name) only refreshes that federate.
+
+        :param fed: Federate running the query
+        :param target: Query target; "broker" for the whole federation
+        :return: Query result
+        '''
+        query = h.helicsCreateQuery(target, "data_flow_graph")
+        graph = h.helicsQueryExecute(query, fed)
+        h.helicsQueryFree(query)
+        self.update(graph)
+        return graph
+
+    def update(self, graph):
+        '''
+        Adds a query result (for a broker, core or federate) to the index,
+        replacing whatever was indexed for the federates it contains.
+
+        :param graph: data_flow_graph query result
+        :return: (none)
+        '''
+        for broker in graph.get("brokers", []):
+            self.update(broker)
+        for core in graph.get("cores", []):
+            self.update(core)
+        for federate in graph.get("federates", []):
+            self._add_federate(federate)
+        # A federate's own result: brokers and cores (even ones with no
+        #   federates) have no interfaces of their own
+        if ("brokers" not in graph and "cores" not in graph and "federates" not in graph
+                and "id" in graph and any(kind in graph for kind in INTERFACES)):
+            self._add_federate(graph)
+
+    def remove_federate(self, fed_id):
+        '''
+        Drops a federate and all its interfaces from the index.
+
+        :param fed_id: Federate ID
+        :return: (none)
+        '''
+        name = self.federates.pop(fed_id, None)
+        if self.federate_ids.get(name) == fed_id:
+            del self.federate_ids[name]
+        for handle in self.publications.pop(fed_id, []) + self.endpoints.pop(fed_id, []):
+            self.handles.pop(handle, None)
+        for handle in self.inputs.pop(fed_id, []):
+            for source in self.sources.pop(handle, []):
+                subscribers = self.subscribers.get(source)
+                if subscribers is not None:
+                    subscribers.discard(handle)
+                    if not subscribers:
+                        del self.subscribers[source]
+
+    def _add_federate(self, federate):
+        fed_id = federate["id"]
+        self.remove_federate(fed_id)
+        self.federates[fed_id] = federate["name"]
+        self.federate_ids[federate["name"]] = fed_id
+
+        # Endpoints, inputs, and publications all are considered handles
+        #   BUT only endpoints and publications contain the mapping
+        #   between handle ID and handle name
+        for kind, table in (("publications", self.publications), ("endpoints", self.endpoints)):
+            table[fed_id] = []
+            for interface in federate.get(kind, []):
+                handle = (interface["federate"], interface["handle"])
+                self.handles[handle] = interface["key"]
+                table[fed_id].append(handle)
+
+        self.inputs[fed_id] = []
+        for interface in federate.get("inputs", []):
+            handle = (interface["federate"], interface["handle"])
+            self.inputs[fed_id].append(handle)
+            self.sources[handle] = [(s["federate"], s["handle"]) for s in interface.get("sources", [])]
+            for source in self.sources[handle]:
+                self.subscribers.setdefault(source, set()).add(handle)
+
+    def publication_keys(self, name):
+        '''
+        :param name: Federate name
+        :return: Keys of the publications of the federate
+        '''
+        fed_id = self.federate_ids.get(name)
+        return [self.handles[handle] for handle in self.publications.get(fed_id, [])]
+
+    def source_keys(self, input_handle):
+        '''
+        :param input_handle: Input handle
+        :return: List of (publication key, federate name) of the sources
+            of the input; the key is None for sources that are not indexed
+        '''
+        return [(self.handles.get(source), self.federates.get(source[0]))
+                for source in self.sources.get(input_handle, [])]
+
+
+def wait_for_publications(fed, target, count=1, timeout=60, delay=0.01, max_delay=1):
+    '''
+    Waits until the target federate has registered at least count
+    publications.
+
+    :param fed: Federate running the queries
+    :param target: Name of the federate whose publications are needed
+    :param count: Number of publications expected
+    :param timeout: Maximum time to wait (seconds)
+    :param delay: Time between the first two queries (seconds); doubled
+        after every query up to max_delay
+    :param max_delay: Longest time between two queries (seconds)
+    :return: Keys of the target's publications
+    '''
+    query = h.helicsCreateQuery(target, "publications")
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            # Until the target has registered the query result is an
+            #   error rather than a list of publications
+            keys = h.helicsQueryExecute(query, fed)
+            if isinstance(keys, list) and len(keys) >= count:
+                return keys
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"{target} did not register {count} "
+                                   f"publications within {timeout} s")
+            time.sleep(min(delay, remaining))
+            delay = min(2 * delay, max_delay)
+    finally:
+        h.helicsQueryFree(query)
@@ -16,7 +16,8 @@ import numpy as np
 import sys
 import argparse
 import matplotlib.pyplot as plt
-import pandas as pd
+from resultstore import ResultStore
+import messagecodec
 plt.style.use('ggplot')
 
 logger = logging.getLogger(__name__)
@@ -183,10 +184,11 @@ if __name__ == "__main__":
 
     # Initial SOC message sent to Charger
     grantedtime = h.helicsFederateRequestTime(fed,0)
+    soc_messages = messagecodec.encode(messagecodec.SOC, currentsoc)
     for j in range(0,end_count):
         end_name = str(h.helicsEndpointGetName(end_EVsoc[j]))
         destination_name = str(h.helicsEndpointGetDefaultDestination(end_EVsoc[j]))
-        h.helicsEndpointSendBytesTo(end_EVsoc[j], str(currentsoc[j]), "") #
+        h.helicsEndpointSendBytesTo(end_EVsoc[j], soc_messages[j], "") #
     time_sim = []
     power = []
 
@@ -206,9 +208,10 @@ if __name__ == "__main__":
             # 1. Receive instructions
             if h.helicsEndpointHasMessage(end_EVsoc[j]):
                 msg = h.helicsEndpointGetMessage(end_EVsoc[j])
-                instructions = h.helicsMessageGetString(msg)
+                instructions = messagecodec.unpack(messagecodec.INSTRUCTION,
+                                                   h.helicsMessageGetBytes(msg))
             # 2. Change SOC based on instructions
-                if int(instructions) == 1:
+                if instructions == 1:
                     logger.debug(f'\tStart SOC: {currentsoc[j]:.4f}')
                     currentpower[j] = charge_rate[(EVlist[j]-1)]
                     addenergy = currentpower[j]*((update_interval+update_offset)/3600)   #time_since_last_msg[j]
@@ -227,13 +230,15 @@ if __name__ == "__main__":
                              f'recieved at '
                              f'time {grantedtime}')
 
-            # 3. Send SOC
-            # send charging current message
-            # to this endpoint's default destination, ""
-            destination_name = str(h.helicsEndpointGetDefaultDestination(end_EVsoc[j]))
-            h.helicsEndpointSendBytesTo(end_EVsoc[j], str(currentsoc[j]), "") #
+        # 3. Send SOC
+        # send charging current message
+        # to this endpoint's default destination, ""
+        # All the SOC messages are encoded in one batch
+        soc_messages = messagecodec.encode(messagecodec.SOC, currentsoc)
+        for j in range(0,end_count):
+            h.helicsEndpointSendBytesTo(end_EVsoc[j], soc_messages[j], "") #
             logger.debug(f'Sent SOC message {currentsoc[j]:.2f}'
-                         f' from endpoint {endpoint_name}'
+                         f' from endpoint {h.helicsEndpointGetName(end_EVsoc[j])}'
                          f' at time {grantedtime}')
 
         power_raw.append(currentpower.copy())
@@ -268,33 +273,12 @@ if __name__ == "__main__":
 
         plt.show()
 
-        t = pd.DataFrame({'Hour':(np.array(time_sim)/3600).T})
-        vals = pd.DataFrame(np.array(power_raw))
-        all_power = t.join(vals)
-        all_power.to_csv(args.outdir+'/power_at_all_evs_'+str(args.seed)+'.csv',index=False)
-
-        vals = pd.DataFrame(np.array(soc))
-        all_soc = t.join(vals)
-        all_soc.to_csv(args.outdir+'/soc_at_all_evs_'+str(args.seed)+'.csv',index=False)
-
-        vals = pd.DataFrame(np.array(power))
-        all_peak_power = t.join(vals)
-        all_peak_power.to_csv(args.outdir+'/peak_power_at_all_evs_'+str(args.seed)+'.csv',index=False)
-
-
     else:
-        t = pd.DataFrame({'Hour':(np.array(time_sim)/3600).T})
-        vals = pd.DataFrame(np.array(power_raw))
-        all_power = t.join(vals)
-        all_power.to_csv(args.outdir+'/power_at_all_evs_'+str(args.seed)+'.csv',index=False)
-
-        vals = pd.DataFrame(np.array(soc))
-        all_soc = t.join(vals)
-        all_soc.to_csv(args.outdir+'/soc_at_all_evs_'+str(args.seed)+'.csv',index=False)
-
-        vals = pd.DataFrame(np.array(power))
-        all_peak_power = t.join(vals)
-        all_peak_power.rename(columns={0: "sample_"+str(args.seed)},inplace=True)
-        all_peak_power.to_csv(args.outdir+'/peak_power_at_all_evs_'+str(args.seed)+'.csv',index=False)
-
         print('no plots generated')
+
+    # Results of every sample go into the same binary store, keyed by seed
+    store = ResultStore(args.outdir)
+    store.write(args.seed, np.array(time_sim)/3600,
+                power=np.array(power_raw),
+                soc=np.array(soc),
+                peak_power=np.array(power))
@@ -12,6 +12,7 @@ import time
 #import graph
 import argparse
 import matplotlib.pyplot as plt
+import messagecodec
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler())
@@ -145,14 +146,16 @@ if __name__ == "__main__":
             endpoint_name = h.helicsEndpointGetName(end_EVsoc[j])
             if h.helicsEndpointHasMessage(end_EVsoc[j]):
                 msg = h.helicsEndpointGetMessage(end_EVsoc[j])
-                currentsoc = h.helicsMessageGetString(msg)
+                currentsoc = messagecodec.unpack(messagecodec.SOC,
+                                                 h.helicsMessageGetBytes(msg))
 
                 print(grantedtime/3600,currentsoc)
-                if float(currentsoc) <= 0.9:
+                if currentsoc <= 0.9:
                     instructions = 1
                 else:
                     instructions = 0
-                message = str(instructions)
+                message = messagecodec.pack(messagecodec.INSTRUCTION,
+                                            instructions)
                 logger.debug(f'\t instructions: {instructions} from '
                              f' endpoint {endpoint_name}'
                              f' at time {grantedtime}')
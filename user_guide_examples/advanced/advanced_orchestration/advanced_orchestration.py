@@ -9,17 +9,28 @@
 import json
 import sys, os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import matplotlib.pyplot as plt
-import pandas as pd
 import numpy as np
+from resultstore import ResultStore
+from quantilesketch import QuantileSketch
 plt.style.use('ggplot')
 
 def tsplot(x, y, n=20, percentile_min=1, percentile_max=99, color='r', plot_mean=True, plot_median=False, line_color='k', **kwargs):
     '''
     This is a plotting helper function. It calculate the lower and upper percentile groups, skipping 50 percentile.
+    y is either the full (samples x time) array or a QuantileSketch the samples have been streamed into.
     '''
-    perc1 = np.percentile(y, np.linspace(percentile_min, 50, num=n, endpoint=False), axis=0)
-    perc2 = np.percentile(y, np.linspace(50, percentile_max, num=n+1)[1:], axis=0)
+    if isinstance(y, QuantileSketch):
+        perc1 = y.quantile(np.linspace(percentile_min, 50, num=n, endpoint=False)/100)
+        perc2 = y.quantile(np.linspace(50, percentile_max, num=n+1)[1:]/100)
+        mean = y.mean
+        median = lambda: y.quantile(0.5)
+    else:
+        perc1 = np.percentile(y, np.linspace(percentile_min, 50, num=n, endpoint=False), axis=0)
+        perc2 = np.percentile(y, np.linspace(50, percentile_max, num=n+1)[1:], axis=0)
+        mean = lambda: np.mean(y, axis=0)
+        median = lambda: np.median(y, axis=0)
 
     if 'alpha' in kwargs:
         alpha = kwargs.pop('alpha')
@@ -29,12 +40,54 @@ def tsplot(x, y, n=20, percentile_min=1, percentile_max=99, color='r', plot_mean
     for p1, p2 in zip(perc1, perc2):
         plt.fill_between(x, p1, p2, alpha=alpha, color=color, edgecolor=None)
     if plot_mean:
-        plt.plot(x, np.mean(y, axis=0), color=line_color)
+        plt.plot(x, mean(), color=line_color)
     if plot_median:
-        plt.plot(x, np.median(y, axis=0), color=line_color)
+        plt.plot(x, median(), color=line_color)
 
     return plt.gca()
 
+def run_sample(cli_filename):
+    '''
+    Runs a single sample federation with the HELICS CLI. The output of
+    the federation is written to a log file alongside its runner JSON so
+    the output of concurrently running samples doesn't get interleaved.
+    '''
+    log_filename = os.path.splitext(cli_filename)[0]+'.log'
+    with open(log_filename, 'w') as log:
+        result = subprocess.run(['helics', 'run', '--path='+cli_filename],
+                                stdout=log, stderr=subprocess.STDOUT)
+    return result.returncode
+
+def run_samples(cli_filename, workers, on_done=None):
+    '''
+    Runs all the sample federations, up to `workers` of them at a time.
+    Each federation is its own set of processes (broker and federates) so
+    the pool only has to launch them and wait. `on_done` is called with
+    the index of each sample that completes successfully, as it does; a
+    sample whose `on_done` raises counts as failed. Returns the indices of
+    the samples that failed.
+    '''
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_sample, f): i for i, f in enumerate(cli_filename)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            try:
+                returncode = future.result()
+            except OSError as e:
+                returncode = e
+            if returncode != 0:
+                failed.append(i)
+                print(f'sample {i} failed ({returncode}), see {os.path.splitext(cli_filename[i])[0]}.log')
+            elif on_done is not None:
+                try:
+                    on_done(i)
+                except Exception as e:
+                    failed.append(i)
+                    print(f'sample {i} ran but its results could not be used ({e!r})')
+            print(f'{done}/{len(futures)} samples complete, {len(failed)} failed')
+    return sorted(failed)
+
 def main():
     # variable inputs from execution
     samples = 30
@@ -43,6 +96,8 @@ def main():
     hours = 24
     plot = 0
     run = 1
+    # Each federation is run by its own broker; one core per federation
+    workers = os.cpu_count()
     if len(sys.argv) > 1:
         samples = sys.argv[1]
         output_path = sys.argv[2]
@@ -50,6 +105,8 @@ def main():
         hours = sys.argv[4]
         plot = sys.argv[5]
         run = sys.argv[6]
+    if len(sys.argv) > 7:
+        workers = int(sys.argv[7])
     print (f"Generating {samples} samples")
     # variable inputs set internal
     out_json = output_path+'/cli_runner_scripts'
@@ -59,8 +116,11 @@ def main():
     if not os.path.exists(out_data):
         os.makedirs(out_data)
     offset = 10
+    # Samples run concurrently so each federation needs its own broker port
+    base_port = 12345
     cli_filename = []
     for i in range(int(samples)):
+        port = str(base_port+i)
         cli_filename.append(out_json+"/advanced_orchestration_runner_"+str(i)+".json")
         cli = open(cli_filename[i], "w")
         cli_json = json.dumps(
@@ -68,21 +128,21 @@ def main():
             "federates": [
                 {
                     "directory": output_path,
-                    "exec": "helics_broker --federates=2 --loglevel=data --coretype=tcpss --port 12345",
+                    "exec": "helics_broker --federates=2 --loglevel=data --coretype=tcpss --port "+port,
                     "host": "localhost",
                     "name": "broker_"+str(i),
                     "loglevel": "data"
                 },
                 {
                     "directory": output_path,
-                    "exec": "python3 Battery.py --port 12345 --seed "+str(i+offset)+" --numEVs "+str(numEVs)+" --hours "+str(hours)+" --plot "+str(plot)+" --outdir "+out_data,
+                    "exec": "python3 Battery.py --port "+port+" --seed "+str(i+offset)+" --numEVs "+str(numEVs)+" --hours "+str(hours)+" --plot "+str(plot)+" --outdir "+out_data,
                     "host": "localhost",
                     "name": "Battery_"+str(i),
                     "loglevel": "data"
                 },
                 {
                     "directory": output_path,
-                    "exec": "python3 Charger.py --port 12345 --numEVs "+str(numEVs)+" --hours "+str(hours),
+                    "exec": "python3 Charger.py --port "+port+" --numEVs "+str(numEVs)+" --hours "+str(hours),
                     "host": "localhost",
                     "name": "Charger_"+str(i),
                     "loglevel": "data"
@@ -97,21 +157,19 @@ def main():
         cli.close()
 
     if int(run) == 1:
-        print('running simulations')
-        peak = []
-        for i in range(int(samples)):
-            print('running file ',cli_filename[i])
-            subprocess.call('helics run --path='+cli_filename[i],shell=True)
-            if i == 0:
-                df = pd.read_csv(out_data+r'/peak_power_at_all_evs_'+str(i+offset)+'.csv')
-            else:
-                df = pd.read_csv(out_data+r'/peak_power_at_all_evs_'+str(i+offset)+'.csv')
-                df.drop(['Hour'], axis=1, inplace=True)
-            peak.append(df)
-
-        peak_power = pd.concat(peak, axis=1)
-        t = np.array(peak_power.Hour)
-        y = np.array(peak_power.iloc[:,1:]).T
+        print(f'running simulations, {workers} at a time')
+        # Each sample's peak power is folded into the percentile sketch
+        #   as soon as it finishes so the samples are never all held in
+        #   memory at once.
+        store = ResultStore(out_data)
+        y = QuantileSketch()
+        failed = run_samples(cli_filename, workers,
+                             lambda i: y.add(store.read_sample('peak_power', i+offset)))
+        if len(failed) == len(cli_filename):
+            sys.exit(f'all {len(failed)} samples failed; nothing to plot')
+        if failed:
+            print(f'plotting the {len(cli_filename)-len(failed)} samples that succeeded')
+        t = store.hour()
         tsplot(t, y, n=100, percentile_min=2.5, percentile_max=97.5, plot_median=True, plot_mean=False, color='g', line_color='navy')
         plt.ylabel('kW')
         plt.xlabel('Hours')
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Binary payloads for the messages exchanged between the chargers (or
+batteries) and the EV controller. Formatting every SOC as text and parsing
+it back with float() costs far more than the value itself; here each
+message is a fixed-size little-endian record
+
+    version (uint8) | kind (uint8) | value
+
+where the value is a float64 for SOC messages and an int8 for charging
+instructions (1: keep charging, 0: stop). The version and kind bytes let
+the receiver reject payloads it doesn't understand rather than misreading
+them.
+
+Both directions work on whole batches: encode() turns an array of values
+into one payload per message from a single NumPy conversion and decode()
+turns a list of payloads back into an array of values.
+"""
+import numpy as np
+
+
+VERSION = 1
+
+# Message kinds
+SOC = 1
+INSTRUCTION = 2
+
+_HEADER = [("version", "u1"), ("kind", "u1")]
+RECORDS = {
+    SOC: np.dtype(_HEADER + [("value", "<f8")]),
+    INSTRUCTION: np.dtype(_HEADER + [("value", "i1")]),
+}
+
+
+def encode(kind, values):
+    '''
+    Encodes values as messages of the given kind.
+
+    :param kind: Message kind (SOC or INSTRUCTION)
+    :param values: Value or array of values
+    :return: List of payloads (bytes), one per value
+    '''
+    values = np.atleast_1d(values)
+    records = np.empty(len(values), RECORDS[kind])
+    records["version"] = VERSION
+    records["kind"] = kind
+    records["value"] = values
+    data = records.tobytes()
+    size = records.itemsize
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def decode(kind, payloads):
+    '''
+    Decodes messages of the given kind.
+
+    :param kind: Message kind (SOC or INSTRUCTION)
+    :param payloads: List of payloads (bytes)
+    :return: Array of values, one per payload
+    '''
+    dtype = RECORDS[kind]
+    data = b"".join(payloads)
+    if len(data) != len(payloads) * dtype.itemsize:
+        raise ValueError(f"messagecodec: payloads are not all "
+                         f"{dtype.itemsize}-byte records")
+    records = np.frombuffer(data, dtype)
+    bad = (records["version"] != VERSION) | (records["kind"] != kind)
+    if bad.any():
+        i = int(np.argmax(bad))
+        raise ValueError(f"messagecodec: unexpected message (version "
+                         f"{records['version'][i]}, kind {records['kind'][i]})")
+    return records["value"]
+
+
+def pack(kind, value):
+    '''
+    :return: Payload (bytes) of a single message
+    '''
+    return encode(kind, value)[0]
+
+
+def unpack(kind, payload):
+    '''
+    :return: Value of a single message
+    '''
+    return decode(kind, [payload])[0]
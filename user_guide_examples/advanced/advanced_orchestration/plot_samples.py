@@ -4,17 +4,27 @@ import json
 import sys, os
 import subprocess
 import matplotlib.pyplot as plt
-import pandas as pd
 import numpy as np
+from resultstore import ResultStore
+from quantilesketch import QuantileSketch
 plt.style.use('ggplot')
 plt.figure(figsize=[5,4])
 
 def tsplot(x, y, n=20, percentile_min=1, percentile_max=99, color='r', plot_mean=True, plot_median=False, line_color='k', **kwargs):
     '''
     This is a plotting helper function. It calculate the lower and upper percentile groups, skipping 50 percentile.
+    y is either the full (samples x time) array or a QuantileSketch the samples have been streamed into.
     '''
-    perc1 = np.percentile(y, np.linspace(percentile_min, 50, num=n, endpoint=False), axis=0)
-    perc2 = np.percentile(y, np.linspace(50, percentile_max, num=n+1)[1:], axis=0)
+    if isinstance(y, QuantileSketch):
+        perc1 = y.quantile(np.linspace(percentile_min, 50, num=n, endpoint=False)/100)
+        perc2 = y.quantile(np.linspace(50, percentile_max, num=n+1)[1:]/100)
+        mean = y.mean
+        median = lambda: y.quantile(0.5)
+    else:
+        perc1 = np.percentile(y, np.linspace(percentile_min, 50, num=n, endpoint=False), axis=0)
+        perc2 = np.percentile(y, np.linspace(50, percentile_max, num=n+1)[1:], axis=0)
+        mean = lambda: np.mean(y, axis=0)
+        median = lambda: np.median(y, axis=0)
 
     if 'alpha' in kwargs:
         alpha = kwargs.pop('alpha')
@@ -24,9 +34,9 @@ def tsplot(x, y, n=20, percentile_min=1, percentile_max=99, color='r', plot_mean
     for p1, p2 in zip(perc1, perc2):
         plt.fill_between(x, p1, p2, alpha=alpha, color=color, edgecolor=None)
     if plot_mean:
-        plt.plot(x, np.mean(y, axis=0), color=line_color)
+        plt.plot(x, mean(), color=line_color)
     if plot_median:
-        plt.plot(x, np.median(y, axis=0), color=line_color)
+        plt.plot(x, median(), color=line_color)
 
     return plt.gca()
 
@@ -42,18 +52,12 @@ def main():
     offset = 10
 
     print('plotting results')
-    peak = []
+    # Samples are streamed into the percentile sketch one at a time
+    store = ResultStore(out_data)
+    t = store.hour()
+    y = QuantileSketch()
     for i in range(int(samples)):
-        if i == 0:
-            df = pd.read_csv(out_data+r'/peak_power_at_all_evs_'+str(i+offset)+'.csv')
-        else:
-            df = pd.read_csv(out_data+r'/peak_power_at_all_evs_'+str(i+offset)+'.csv')
-            df.drop(['Hour'], axis=1, inplace=True)
-        peak.append(df)
-
-    peak_power = pd.concat(peak, axis=1)
-    t = np.array(peak_power.Hour)
-    y = np.array(peak_power.iloc[:,1:]).T
+        y.add(store.read_sample('peak_power', i+offset))
     tsplot(t, y, n=100, percentile_min=2.5, percentile_max=97.5, plot_median=True, plot_mean=False, color='g', line_color='navy')
     plt.ylabel('kW')
     plt.xlabel('Hours')
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Streaming percentiles of a time series over a very large number of
+samples. Rather than holding every sample's time series in memory to
+call np.percentile, samples are added to a KLL-style quantile sketch one
+at a time as they finish and only a bounded number of values are kept.
+
+The sketch keeps a stack of buffers ("levels"). Values at level h each
+stand for 2**h of the original samples. When a level fills up it is
+sorted and every other value (starting at random) is promoted to the
+level above, halving its size. Since every sample has a value at every
+point in time, every time point goes through exactly the same sequence
+of compactions and the whole time series is handled as one 2-D array.
+Memory is about k * log2(n / k) values per time point and the rank
+error of the answers is on the order of 1/k.
+"""
+import numpy as np
+
+
+class QuantileSketch:
+    '''
+    :param k: Capacity of each level; larger is more accurate
+    :param seed: Seed for the random compaction offsets
+    '''
+    def __init__(self, k=256, seed=None):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+        self._levels = []
+        self._fill = []
+        self._sum = None
+
+    def add(self, values):
+        '''
+        Adds one sample's time series to the sketch.
+
+        :param values: 1-D array with one value per point in time
+        :return: (none)
+        '''
+        values = np.asarray(values, dtype=float)
+        if self._sum is None:
+            self._sum = np.zeros(values.shape)
+            self._levels.append(np.empty((self.k,) + values.shape))
+            self._fill.append(0)
+        self._sum += values
+        self._levels[0][self._fill[0]] = values
+        self._fill[0] += 1
+        self.count += 1
+        if self._fill[0] == self.k:
+            self._compact(0)
+
+    def _compact(self, h):
+        buf = self._levels[h][:self._fill[h]]
+        buf.sort(axis=0)
+        # An odd number of values leaves the largest one behind at
+        #   this level
+        leftover = len(buf) % 2
+        promoted = buf[self.rng.integers(2):len(buf) - leftover:2].copy()
+        if leftover:
+            self._levels[h][0] = buf[-1]
+        self._fill[h] = leftover
+
+        if h + 1 == len(self._levels):
+            self._levels.append(np.empty(self._levels[0].shape))
+            self._fill.append(0)
+        # Promoted values may not all fit in the level above; compact it
+        #   as often as needed to make room.
+        while len(promoted) > 0:
+            fill = self._fill[h + 1]
+            n = min(self.k - fill, len(promoted))
+            self._levels[h + 1][fill:fill + n] = promoted[:n]
+            self._fill[h + 1] += n
+            promoted = promoted[n:]
+            if self._fill[h + 1] == self.k:
+                self._compact(h + 1)
+
+    def mean(self):
+        '''
+        :return: Exact mean of all samples at each point in time
+        '''
+        return self._sum / self.count
+
+    def quantile(self, q):
+        '''
+        Estimates the given quantiles at each point in time. Like
+        np.percentile, the answer is interpolated linearly between the
+        values either side of the requested rank, so while no compaction
+        has happened (fewer than k samples) it is the same as
+        np.percentile's.
+
+        :param q: Quantile or sequence of quantiles (0-1)
+        :return: Array of shape (len(q), time) (or (time,) for a scalar q)
+        '''
+        scalar = np.ndim(q) == 0
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        values = np.concatenate([level[:fill] for level, fill
+                                 in zip(self._levels, self._fill)])
+        weights = np.concatenate([np.full(fill, 2.0 ** h) for h, fill
+                                  in enumerate(self._fill)])
+        order = np.argsort(values, axis=0)
+        values = np.take_along_axis(values, order, axis=0)
+        weights = weights[order]
+        cum_weights = np.cumsum(weights, axis=0)
+        total = cum_weights[-1]
+        # A value standing for w samples covers the w ranks below its
+        #   cumulative weight and is placed at the middle one; with every
+        #   weight 1 the value at sorted index i is at rank i.
+        rank = cum_weights - (weights + 1) / 2
+
+        result = np.empty((len(q),) + values.shape[1:])
+        if len(values) == 1:
+            result[:] = values[0]
+            return result[0] if scalar else result
+        for i, qi in enumerate(q):
+            target = qi * (total - 1)
+            # Values either side of the requested rank
+            lo = np.sum(rank <= target, axis=0) - 1
+            lo = np.clip(lo, 0, len(values) - 2)[np.newaxis]
+            hi = lo + 1
+            v_lo = np.take_along_axis(values, lo, axis=0)[0]
+            v_hi = np.take_along_axis(values, hi, axis=0)[0]
+            r_lo = np.take_along_axis(rank, lo, axis=0)[0]
+            r_hi = np.take_along_axis(rank, hi, axis=0)[0]
+            frac = np.clip((target - r_lo) / (r_hi - r_lo), 0, 1)
+            result[i] = v_lo + frac * (v_hi - v_lo)
+        return result[0] if scalar else result
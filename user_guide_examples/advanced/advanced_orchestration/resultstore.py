@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Binary store for the results of the Monte Carlo samples. Each sample
+(Battery federate) writes its time series as NumPy arrays, one chunk per
+variable, keyed by its random seed:
+
+    results/
+        hour.npy                    time axis shared by all samples
+        peak_power/12.npy           one chunk per seed
+
+Since every sample only writes its own files, any number of samples can
+write to the store at once. Samples are read back one at a time as
+memory-mapped arrays, so aggregation and plotting only touch the
+variable they need and never parse any text.
+"""
+import os
+import numpy as np
+
+
+def _save(filename, values):
+    # Write to a temporary file and move it into place so readers never
+    #   see a partially written array.
+    tmp_filename = f'{filename}.{os.getpid()}.tmp.npy'
+    np.save(tmp_filename, values)
+    os.replace(tmp_filename, filename)
+
+
+class ResultStore:
+    '''
+    :param path: Directory holding the store
+    '''
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, seed, hour, **variables):
+        '''
+        Adds the results of one sample to the store.
+
+        :param seed: Random seed of the sample
+        :param hour: Time axis of the sample (hours)
+        :param variables: Arrays of results, with time along the first axis
+        :return: (none)
+        '''
+        os.makedirs(self.path, exist_ok=True)
+        _save(os.path.join(self.path, 'hour.npy'), np.asarray(hour))
+        for name, values in variables.items():
+            os.makedirs(os.path.join(self.path, name), exist_ok=True)
+            _save(os.path.join(self.path, name, f'{seed}.npy'),
+                  np.asarray(values))
+
+    def hour(self):
+        '''
+        :return: Time axis shared by all samples (hours)
+        '''
+        return np.load(os.path.join(self.path, 'hour.npy'))
+
+    def seeds(self, variable):
+        '''
+        :param variable: Name of the variable
+        :return: Sorted list of the seeds with results for the variable
+        '''
+        return sorted(int(f[:-len('.npy')])
+                      for f in os.listdir(os.path.join(self.path, variable))
+                      if f.endswith('.npy') and '.tmp' not in f)
+
+    def read_sample(self, variable, seed):
+        '''
+        Reads one variable for a single sample.
+
+        :param variable: Name of the variable
+        :param seed: Seed of the sample
+        :return: Memory-mapped array
+        '''
+        return np.load(os.path.join(self.path, variable, f'{seed}.npy'),
+                       mmap_mode='r')
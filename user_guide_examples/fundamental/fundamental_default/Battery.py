@@ -18,6 +18,9 @@ import helics as h
 import logging
 import numpy as np
 import matplotlib.pyplot as plt
+from activeset import ActiveSet, ACTIVE, IDLE
+from batteryfleet import BatteryFleet
+from nextevent import NextEventPlanner
 
 
 logger = logging.getLogger(__name__)
@@ -92,6 +95,9 @@ if __name__ == "__main__":
         subid[i] = h.helicsFederateGetInputByIndex(fed, i)
         sub_name = h.helicsSubscriptionGetTarget(subid[i])
         logger.debug(f"\tRegistered subscription---> {sub_name}")
+        # The Charger republishes the same voltage every period; only a
+        #   change in voltage needs to wake this federate up
+        h.helicsInputSetOption(subid[i], h.HELICS_HANDLE_OPTION_ONLY_UPDATE_ON_CHANGE, 1)
 
     pubid = {}
     for i in range(0, pub_count):
@@ -109,17 +115,31 @@ if __name__ == "__main__":
     # 8 ohms to 150 ohms
     effective_R = np.array([8, 150])
 
-    batt_list = get_new_battery(pub_count)
+    # The fleet holds the size and SOC of every battery in arrays so the
+    #  physics of all batteries is advanced in a single call. The SOC is
+    #  integrated exactly so it doesn't depend on the time step.
+    initial_soc = np.random.randint(0, 60, pub_count) / 100
+    fleet = BatteryFleet(get_new_battery(pub_count), initial_soc, socs, effective_R, exact=True)
+    charging_voltage = np.zeros(pub_count)
 
-    current_soc = {}
-    for i in range(0, pub_count):
-        current_soc[i] = (np.random.randint(0, 60)) / 100
+    # Batteries that are full or have no charging voltage are idle; only
+    #   the active (charging) ones are advanced and published each step.
+    batteries = ActiveSet(pub_count, IDLE)
 
     hours = 24 * 7
     total_interval = int(60 * 60 * hours)
     update_interval = int(h.helicsFederateGetTimeProperty(fed, h.HELICS_PROPERTY_TIME_PERIOD))
     grantedtime = 0
 
+    # Rather than stepping every period for the whole week, time is
+    #   requested for when something next happens: every output_deadline
+    #   while any battery is charging, or when a battery will become full,
+    #   and otherwise not until the Charger changes a voltage.
+    output_deadline = update_interval
+    planner = NextEventPlanner(update_interval, total_interval, output_deadline)
+    requested_time = update_interval
+    charging = True
+
     # Data collection lists
     time_sim = []
     total_current = []
@@ -128,51 +148,60 @@ if __name__ == "__main__":
     # As long as granted time is in the time range to be simulated...
     while grantedtime < total_interval:
 
-        # Time request for the next physical interval to be simulated
-        requested_time = grantedtime + update_interval
+        # Time request for the next event to be simulated
         logger.debug(f"Requesting time {requested_time}")
+        last_time = grantedtime
         grantedtime = h.helicsFederateRequestTime(fed, requested_time)
         logger.debug(f"Granted time {grantedtime}")
 
         # Iterating over publications in this case since this example
         #  uses only one charging voltage for all five batteries
-
         for j in range(0, pub_count):
-            logger.debug(f"Battery {j+1} time {grantedtime}")
-
             # Get the applied charging voltage from the EV
-            charging_voltage = h.helicsInputGetDouble((subid[j]))
-            logger.debug(f"\tReceived voltage {charging_voltage:.2f}" 
+            charging_voltage[j] = h.helicsInputGetDouble((subid[j]))
+
+        # If battery is full assume its stops charging on its own and the
+        #  charging current goes to zero; it is published one last time.
+        active = batteries.active
+        stopped = active[(charging_voltage[active] <= 0) | (fleet.soc[active] >= 1)]
+        fleet.stop(stopped)
+        batteries.move(stopped, IDLE)
+        idle = batteries.idle
+        batteries.move(idle[(charging_voltage[idle] > 0) & (fleet.soc[idle] < 1)], ACTIVE)
+
+        # Calculate charging current and update SOC.
+        #  After a stretch with no battery charging the new voltage is
+        #  applied for one period, as when stepping every period.
+        dt = grantedtime - last_time if charging else update_interval
+        active = batteries.active
+        charging_current = fleet.advance(charging_voltage, dt, active)
+
+        for j in np.r_[active, stopped].tolist():
+            logger.debug(f"Battery {j+1} time {grantedtime}")
+            logger.debug(f"\tReceived voltage {charging_voltage[j]:.2f}" 
                         f" from input {h.helicsSubscriptionGetTarget(subid[j])}")
-
-            # Calculate charging current and update SOC
-            R = np.interp(current_soc[j], socs, effective_R)
-            logger.debug(f"\tEffective R (ohms): {R:.2f}")
-            # If battery is full assume its stops charging on its own
-            #  and the charging current goes to zero.
-            if current_soc[j] >= 1:
-                charging_current = 0
-            else:
-                charging_current = charging_voltage / R
-            logger.debug(f"\tCharging current (A): {charging_current:.2f}")
-
-            added_energy = (charging_current * charging_voltage * update_interval / 3600) / 1000
-            logger.debug(f"\tAdded energy (kWh): {added_energy:.4f}")
-            current_soc[j] = current_soc[j] + added_energy / batt_list[j]
-            logger.debug(f"\tSOC: {current_soc[j]:.4f}")
+            logger.debug(f"\tEffective R (ohms): {fleet.R[j]:.2f}")
+            logger.debug(f"\tCharging current (A): {charging_current[j]:.2f}")
+            logger.debug(f"\tAdded energy (kWh): {fleet.added_energy[j]:.4f}")
+            logger.debug(f"\tSOC: {fleet.soc[j]:.4f}")
 
             # Publish out charging current
-            h.helicsPublicationPublishDouble(pubid[j], charging_current)
-            logger.debug(f"\tPublished {h.helicsPublicationGetName(pubid[j])} with value " f"{charging_current:.2f}")
+            h.helicsPublicationPublishDouble(pubid[j], charging_current[j])
+            logger.debug(f"\tPublished {h.helicsPublicationGetName(pubid[j])} with value " f"{charging_current[j]:.2f}")
 
-            # Store SOC for later analysis/graphing
+        # Store SOC for later analysis/graphing
+        for j in range(0, pub_count):
             if pubid[j] not in soc:
                 soc[pubid[j]] = []
-            soc[pubid[j]].append(float(current_soc[j]))
+            soc[pubid[j]].append(float(fleet.soc[j]))
 
         # Data collection vectors
         time_sim.append(grantedtime)
 
+        charging = active.size > 0
+        requested_time = planner.next_time(
+            grantedtime, grantedtime + fleet.time_to_full(charging_voltage, active), charging)
+
     # Cleaning up HELICS stuff once we've finished the co-simulation.
     destroy_federate(fed)
     # Printing out final results graphs for comparison/diagnostic purposes.
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Tracking of which entities in a federate's model (batteries, charging
+ports) actually need simulating. Each entity is in one of three sets:
+
+    ACTIVE      simulated every time step
+    IDLE        nothing to simulate until something outside the model
+                changes (e.g. a full battery, or a port whose EV has been
+                told to stop charging)
+    REPLACED    a new entity (e.g. a newly arrived EV) has just taken its
+                place and is waiting to start
+
+The set of each entity is kept in one small array and the indices of the
+members of each set are only recomputed after entities have moved, so a
+federate that does its per-step work on the active indices does work in
+proportion to the number of active entities rather than the total. Which
+events move entities between the sets is up to the federate.
+"""
+import numpy as np
+
+
+ACTIVE = 0
+IDLE = 1
+REPLACED = 2
+
+
+class ActiveSet:
+    '''
+    :param n: Number of entities
+    :param state: Set every entity starts in (ACTIVE, IDLE or REPLACED)
+    '''
+    def __init__(self, n, state=ACTIVE):
+        self.state = np.full(n, state, dtype=np.int8)
+        self._members = {}
+
+    def __len__(self):
+        return len(self.state)
+
+    def members(self, state):
+        '''
+        :param state: ACTIVE, IDLE or REPLACED
+        :return: Sorted array of the indices of the entities in that set
+            (reused until entities move; don't modify it)
+        '''
+        members = self._members.get(state)
+        if members is None:
+            members = np.flatnonzero(self.state == state)
+            self._members[state] = members
+        return members
+
+    @property
+    def active(self):
+        return self.members(ACTIVE)
+
+    @property
+    def idle(self):
+        return self.members(IDLE)
+
+    @property
+    def replaced(self):
+        return self.members(REPLACED)
+
+    def move(self, index, state):
+        '''
+        Moves entities to another set.
+
+        :param index: Index array (or boolean mask) of the entities to move
+        :param state: Set to move them to
+        :return: Array of the indices of the entities moved
+        '''
+        index = np.asarray(index)
+        if index.dtype == bool:
+            index = np.flatnonzero(index)
+        if index.size:
+            self.state[index] = state
+            self._members.clear()
+        return index
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Vectorized model of all the EV batteries managed by a single Battery
+federate. Rather than keeping the SOC and size of each battery in its own
+dictionary entry and stepping them one at a time, the fleet holds them in
+contiguous NumPy arrays and advances every battery with a single call per
+granted time.
+"""
+import numpy as np
+
+from socintegration import integrate_table
+
+
+class BatteryFleet:
+    '''
+    State and physics for a fleet of EV batteries.
+
+    :param capacity: Battery sizes in kWh (as produced by get_new_battery)
+    :param soc: Initial state of charge of each battery (0-1)
+    :param socs: SOC breakpoints of the effective resistance table
+    :param effective_R: Effective resistance (ohms) at each SOC breakpoint
+    :param cutoff: If True, a battery with an SOC of 1 or more stops
+        drawing current on its own.
+    :param exact: If True, the SOC is integrated exactly over each
+        interval (see socintegration) rather than with the effective
+        resistance frozen at its value at the start of the interval, so
+        the SOC stays accurate with long intervals.
+    '''
+    def __init__(self, capacity, soc, socs=(0, 1), effective_R=(8, 150),
+                 cutoff=True, exact=False):
+        self.capacity = np.array(capacity, dtype=float)
+        self.soc = np.array(soc, dtype=float)
+        self.socs = np.array(socs, dtype=float)
+        self.effective_R = np.array(effective_R, dtype=float)
+        self.cutoff = cutoff
+        self.exact = exact
+        self.R = self.resistance()
+        self.current = np.zeros(len(self.soc))
+        self.added_energy = np.zeros(len(self.soc))
+
+    def __len__(self):
+        return len(self.soc)
+
+    def resistance(self):
+        '''
+        Effective resistance of every battery at its present SOC.
+
+        :return: Array of effective resistances (ohms)
+        '''
+        return np.interp(self.soc, self.socs, self.effective_R)
+
+    def full(self):
+        '''
+        :return: Boolean mask of the batteries with an SOC of 1 or more
+        '''
+        return self.soc >= 1
+
+    def charging(self, voltage):
+        '''
+        :param voltage: Charging voltage applied to each battery (V)
+        :return: Boolean mask of the batteries drawing current
+        '''
+        charging = np.asarray(voltage) > 0
+        if self.cutoff:
+            charging &= ~self.full()
+        return charging
+
+    def time_to_full(self, voltage, index=None):
+        '''
+        Time each battery would take to reach full SOC at its present
+        charging rate. As the effective resistance rises with SOC the
+        charging rate only drops, so this never overestimates it.
+
+        :param voltage: Charging voltage applied to each battery (V)
+        :param index: Indices of the batteries to consider; by default all
+        :return: Array of times (s), one per battery considered; inf for
+            batteries that are not charging
+        '''
+        i = slice(None) if index is None else index
+        voltage = np.asarray(voltage, dtype=float)[i]
+        soc = self.soc[i]
+        power = voltage ** 2 / np.interp(soc, self.socs, self.effective_R) / 1000
+        remaining = (1 - soc) * self.capacity[i]
+        t = np.full(len(soc), np.inf)
+        charging = (voltage > 0) & (remaining > 0)
+        t[charging] = remaining[charging] * 3600 / power[charging]
+        return t
+
+    def advance(self, voltage, dt, index=None):
+        '''
+        Applies the charging voltage to the batteries for dt seconds,
+        updating the SOC and returning the charging current drawn by each
+        battery. The current is calculated from the SOC at the start of
+        the interval, exactly as the per-battery loop did, or, for an exact
+        fleet, is the average current over the interval.
+
+        :param voltage: Charging voltage applied to each battery (V)
+        :param dt: Length of the interval being simulated (s)
+        :param index: Indices of the batteries to advance (e.g. the active
+            ones); by default all. The others are left as they are.
+        :return: Array of charging currents (A) of every battery
+        '''
+        i = slice(None) if index is None else index
+        voltage = np.asarray(voltage, dtype=float)[i]
+        soc = self.soc[i]
+        capacity = self.capacity[i]
+        R = np.interp(soc, self.socs, self.effective_R)
+        if self.exact:
+            new_soc = integrate_table(soc, voltage, dt, capacity,
+                                      self.socs, self.effective_R,
+                                      limit=1 if self.cutoff else np.inf)
+            added_energy = (new_soc - soc) * capacity
+            current = np.zeros(len(soc))
+            charging = voltage > 0
+            current[charging] = (added_energy[charging] * 3.6e6
+                                 / (voltage[charging] * dt))
+        else:
+            current = voltage / R
+            if self.cutoff:
+                # If battery is full assume its stops charging on its own
+                #  and the charging current goes to zero.
+                current[soc >= 1] = 0
+            added_energy = (current * voltage * dt / 3600) / 1000
+            new_soc = soc + added_energy / capacity
+        self.R[i] = R
+        self.current[i] = current
+        self.added_energy[i] = added_energy
+        self.soc[i] = new_soc
+        return self.current
+
+    def stop(self, index):
+        '''
+        Sets the charging current and added energy of the batteries that
+        have stopped charging (and so are no longer advanced) to zero.
+
+        :param index: Boolean mask (or index array) of the batteries
+        :return: (none)
+        '''
+        self.current[index] = 0
+        self.added_energy[index] = 0
+
+    def replace(self, mask, capacity, soc):
+        '''
+        Swaps out the batteries selected by mask for new ones.
+
+        :param mask: Boolean mask (or index array) of batteries to replace
+        :param capacity: Sizes (kWh) of the new batteries
+        :param soc: Initial SOC of the new batteries
+        :return: (none)
+        '''
+        self.capacity[mask] = capacity
+        self.soc[mask] = soc
+        self.R[mask] = np.interp(self.soc[mask], self.socs, self.effective_R)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Next-event time requests. A federate that requests grantedtime + period
+every step is granted every period of the co-simulation even when nothing
+it models is changing, e.g. batteries that are all full and drawing no
+current. Instead, the federate can tell the planner when it next expects
+something to happen in its own model (such as a battery reaching full
+SOC) and whether its outputs are still changing, and request the time it
+returns:
+
+    - while the outputs are changing, no later than the output deadline
+      (by default one period) after the granted time
+    - otherwise, no later than the earliest predicted event, or the end
+      of the simulation if there is none
+
+Changes to the federate's inputs are not predicted; for those the
+federate relies on HELICS granting it an earlier time when an input is
+updated, so it must be interruptible and its inputs should only be
+updated when the value actually changes ("only_update_on_change").
+"""
+import math
+
+import numpy as np
+
+
+class NextEventPlanner:
+    '''
+    :param period: Federate period (s); requested times are multiples of it
+    :param stop: End of the simulation (s)
+    :param deadline: Longest time (s) between two time requests while the
+        outputs are changing; defaults to one period
+    '''
+    def __init__(self, period, stop, deadline=None):
+        self.period = period
+        self.stop = stop
+        self.deadline = period if deadline is None else deadline
+
+    def next_time(self, granted, events=(), changing=True):
+        '''
+        :param granted: Time just granted (s)
+        :param events: Predicted times (s) of events in the federate's model
+        :param changing: Whether the outputs are still changing
+        :return: Time to request (s)
+        '''
+        t = self.stop
+        if changing:
+            t = min(t, granted + self.deadline)
+        events = np.asarray(events, dtype=float)
+        events = events[events > granted]
+        if events.size:
+            t = min(t, events.min())
+        # On the period grid and at least one period ahead
+        t = max(math.ceil(t / self.period) * self.period, granted + self.period)
+        return min(t, max(self.stop, granted + self.period))
@@ -21,6 +21,7 @@ import helics as h
 import logging
 import numpy as np
 import matplotlib.pyplot as plt
+from chargerbank import ChargerBank
 
 
 logger = logging.getLogger(__name__)
@@ -48,40 +49,14 @@ def destroy_federate(fed):
     h.helicsCloseLibrary()
     logger.info('Federate finalized')
 
-def calc_charging_voltage(EV_list):
-    '''
-    This function uses the pre-defined charging powers and maps them to
-    standard (more or less) charging voltages. This allows the charger
-    to apply an appropriately modeled voltage to the EV based on the
-    charging power level
-
-    :param EV_list: Value of "1", "2", or "3" to indicate charging level
-    :return: charging_voltage: List of charging voltages corresponding
-            to the charging power.
-    '''
-
-    charging_voltage = []
-    # Ignoring the difference between AC and DC voltages for this application
-    charge_voltages = [120, 240, 630]
-    for EV in EV_list:
-        if EV == 1:
-            charging_voltage.append(charge_voltages[0])
-        elif EV==2:
-            charging_voltage.append(charge_voltages[1])
-        elif EV==3:
-            charging_voltage.append(charge_voltages[2])
-        else:
-            charging_voltage.append(0)
-
-    return charging_voltage
-
-def get_new_EV(numEVs):
+def get_new_EV(numEVs, rng=np.random):
     '''
     Using hard-coded probabilities, a distribution of EVs with support
     for specific charging levels are generated. The number of EVs
     generated is defined by the user.
 
     :param numEVs: Number of EVs
+    :param rng: numpy Generator (or np.random) used for the draw
     :return
         numLvL1: Number of new EVs that will charge at level 1
         numLvL2: Number of new EVs that will charge at level 2
@@ -94,7 +69,7 @@ def get_new_EV(numEVs):
     lvl1 = 0.05
     lvl2 = 0.6
     lvl3 = 0.35
-    listOfEVs = np.random.choice([1,2,3],numEVs,p=[lvl1,lvl2,lvl3]).tolist()
+    listOfEVs = rng.choice([1,2,3],numEVs,p=[lvl1,lvl2,lvl3]).tolist()
     numLvl1 = listOfEVs.count(1)
     numLvl2 = listOfEVs.count(2)
     numLvl3 = listOfEVs.count(3)
@@ -102,37 +77,8 @@ def get_new_EV(numEVs):
     return numLvl1,numLvl2,numLvl3,listOfEVs
 
 
-def estimate_SOC(charging_V, charging_A):
-    '''
-    The charger has no direct knowledge of the SOC of the EV battery it
-    is charging but instead must estimate it based on the effective resistance
-    of the battery which is calculated from the applied charging voltage and
-    measured charging current. The effective resistance model used here is
-    identical to that of the actual battery; if both the charging voltage
-    and current were measured perfectly the SOC estimate here would exactly
-    match the true SOC modeled by the battery. For fun, though, a small
-    amount of Gaussian noise is added to the current value. This noise
-    creates larger errors as the charging current goes down (EV battery
-    reaching full SOC).
-
-    :param charging_V: Applied charging voltage
-    :param charging_A: Charging current as passed back by the battery federate
-    :return: SOC estimate
-    '''
-    socs = np.array([0, 1])
-    effective_R = np.array([8, 150])
-    mu = 0
-    sigma = 0.2
-    noise = np.random.normal(mu, sigma)
-    measured_A = charging_A + noise
-    measured_R = charging_V / measured_A
-    SOC_estimate = np.interp(measured_R, effective_R, socs)
-
-    return SOC_estimate
-
-
 if __name__ == "__main__":
-    np.random.seed(268)
+    rng = np.random.default_rng(268)
 
     ##############  Registering  federate from json  ##########################
     fed = h.helicsCreateCombinationFederateFromConfig("ChargerConfig.json")
@@ -157,13 +103,11 @@ if __name__ == "__main__":
         end_name = h.helicsEndpointGetName(endid[i])
         logger.debug(f'\tRegistered Endpoint ---> {end_name}')
 
-    charging_current = []
     subid = {}
     for i in range(0, sub_count):
         subid[i] = h.helicsFederateGetInputByIndex(fed, i)
         sub_name = h.helicsSubscriptionGetTarget(subid[i])
         logger.debug(f'\tRegistered subscription---> {sub_name}')
-        charging_current.append(0)
 
     pubid = {}
     for i in range(0, pub_count):
@@ -182,9 +126,8 @@ if __name__ == "__main__":
     # Generate an initial fleet of EVs, one for each previously defined
     #   endpoint. This gives each EV a unique link to the EV controller
     #   federate.
-    numLvl1,numLvl2,numLvl3,EVlist = get_new_EV(end_count)
-    charging_voltage = calc_charging_voltage(EVlist)
-    currentsoc = {}
+    numLvl1,numLvl2,numLvl3,EVlist = get_new_EV(end_count, rng)
+    bank = ChargerBank(EVlist, rng)
 
     hours = 24*1 # one week
     total_interval = int(60 * 60 * hours)
@@ -206,8 +149,8 @@ if __name__ == "__main__":
 
     # Apply initial charging voltage
     for j in range(0, pub_count):
-        h.helicsPublicationPublishDouble(pubid[j], charging_voltage[j])
-        logger.debug(f'\tPublishing charging voltage of {charging_voltage[j]} '
+        h.helicsPublicationPublishDouble(pubid[j], bank.voltage[j])
+        logger.debug(f'\tPublishing charging voltage of {bank.voltage[j]} '
                      f' at time {grantedtime}')
 
 
@@ -221,31 +164,34 @@ if __name__ == "__main__":
         grantedtime = h.helicsFederateRequestTime (fed, requested_time)
         logger.debug(f'Granted time {grantedtime}')
 
+        # Model the physics of the battery charging. This happens
+        #   every time step whether a message comes in or not and always
+        #   uses the latest value provided by the battery model.
+        charging_current = np.array([h.helicsInputGetDouble(subid[j])
+                                     for j in range(0, end_count)])
+
+        # SOC estimation
+        bank.estimate_SOC(charging_current)
+
+        # New EV is in place after removing charge from old EV,
+        # as indicated by the zero current draw.
+        new_EV = charging_current == 0
+        num_new = int(np.count_nonzero(new_EV))
+        if num_new:
+            _, _, _, newEVtypes = get_new_EV(num_new, rng)
+            bank.replace(new_EV, newEVtypes)
+
         for j in range(0,end_count):
             logger.debug(f'EV {j+1} time {grantedtime}')
-            # Model the physics of the battery charging. This happens
-            #   every time step whether a message comes in or not and always
-            #   uses the latest value provided by the battery model.
-            charging_current[j] = h.helicsInputGetDouble((subid[j]))
             logger.debug(f'\tCharging current: {charging_current[j]:.2f} from '
                          f'input {h.helicsSubscriptionGetTarget(subid[j])}')
 
-            # New EV is in place after removing charge from old EV,
-            # as indicated by the zero current draw.
-            if charging_current[j] == 0:
-                _, _, _, newEVtype = get_new_EV(1)
-                EVlist[j] = newEVtype[0]
-                charge_V = calc_charging_voltage(newEVtype)
-                charging_voltage[j] = charge_V[0]
-
-                currentsoc[j] = 0 # Initial SOC estimate
-                logger.debug(f'\t New EV, SOC estimate: {currentsoc[j]:.4f}')
+            if new_EV[j]:
+                logger.debug(f'\t New EV, SOC estimate: {bank.soc_estimate[j]:.4f}')
                 logger.debug(f'\t New EV, charging voltage:'
-                             f' {charging_voltage[j]}')
+                             f' {bank.voltage[j]}')
             else:
-                # SOC estimation
-                currentsoc[j] = estimate_SOC(charging_voltage[j], charging_current[j])
-                logger.debug(f'\t EV SOC estimate: {currentsoc[j]:.4f}')
+                logger.debug(f'\t EV SOC estimate: {bank.soc_estimate[j]:.4f}')
 
 
 
@@ -266,7 +212,7 @@ if __name__ == "__main__":
                 #   do something if the controller says to stop
                 if int(instructions) == 0:
                     # Stop charging this EV
-                    charging_voltage[j] = 0
+                    bank.voltage[j] = 0
                     logger.info(f'\tEV full; removing charging voltage')
             else:
                 logger.debug(f'\tNo messages at endpoint {endpoint_name} '
@@ -274,15 +220,15 @@ if __name__ == "__main__":
                              f'time {grantedtime}')
 
             # Publish updated charging voltage
-            h.helicsPublicationPublishDouble(pubid[j], charging_voltage[j])
-            logger.debug(f'\tPublishing charging voltage of {charging_voltage[j]} '
+            h.helicsPublicationPublishDouble(pubid[j], bank.voltage[j])
+            logger.debug(f'\tPublishing charging voltage of {bank.voltage[j]} '
                          f' at time {grantedtime}')
 
             # Send message to Controller with SOC every 15 minutes
             if grantedtime % 900 == 0:
                 destination_name = str(
                     h.helicsEndpointGetDefaultDestination(endid[j]))
-                message = f'{currentsoc[j]:4f}'
+                message = f'{bank.soc_estimate[j]:4f}'
                 h.helicsEndpointSendBytesTo(endid[j], message.encode(), '')
                 logger.debug(f'Sent message from endpoint {endpoint_name}'
                              f' to destination {destination_name}'
@@ -292,11 +238,7 @@ if __name__ == "__main__":
         # Calculate the total power required by all chargers. This is the
         #   primary metric of interest, to understand the power profile
         #   and capacity requirements required for this charging garage.
-        total_power = 0
-        #logger.debug(f'Calculating charging power')
-        for j in range(0,pub_count):
-            total_power += (charging_voltage[j] * charging_current[j])
-            #logger.debug(f'\tCharging power in kW for EV{j+1}: {charging_power}')
+        total_power = bank.power()
 
         # Data collection vectors
         time_sim.append(grantedtime)
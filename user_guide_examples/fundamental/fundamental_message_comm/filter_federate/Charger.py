@@ -21,6 +21,7 @@ import helics as h
 import logging
 import numpy as np
 import matplotlib.pyplot as plt
+from chargerbank import ChargerBank
 import time
 
 logger = logging.getLogger(__name__)
@@ -49,13 +50,14 @@ def destroy_federate(fed):
     logger.info('Federate finalized')
 
 
-def get_new_EV(numEVs):
+def get_new_EV(numEVs, rng=np.random):
     '''
     Using hard-coded probabilities, a distribution of EVs with support
     for specific charging levels are generated. The number of EVs
     generated is defined by the user.
 
     :param numEVs: Number of EVs
+    :param rng: numpy Generator (or np.random) used for the draw
     :return
         numLvL1: Number of new EVs that will charge at level 1
         numLvL2: Number of new EVs that will charge at level 2
@@ -68,7 +70,7 @@ def get_new_EV(numEVs):
     lvl1 = 0.05
     lvl2 = 0.6
     lvl3 = 0.35
-    listOfEVs = np.random.choice([1,2,3],numEVs,p=[lvl1,lvl2,lvl3]).tolist()
+    listOfEVs = rng.choice([1,2,3],numEVs,p=[lvl1,lvl2,lvl3]).tolist()
     numLvl1 = listOfEVs.count(1)
     numLvl2 = listOfEVs.count(2)
     numLvl3 = listOfEVs.count(3)
@@ -78,65 +80,8 @@ def get_new_EV(numEVs):
 
 
 
-def calc_charging_voltage(EV_list):
-    '''
-    This function uses the pre-defined charging powers and maps them to
-    standard (more or less) charging voltages. This allows the charger
-    to apply an appropriately modeled voltage to the EV based on the
-    charging power level
-
-    :param EV_list: Value of "1", "2", or "3" to indicate charging level
-    :return: charging_voltage: List of charging voltages corresponding
-            to the charging power.
-    '''
-
-    charging_voltage = []
-    # Ignoring the difference between AC and DC voltages for this application
-    charge_voltages = [120, 240, 630]
-    for EV in EV_list:
-        if EV == 1:
-            charging_voltage.append(charge_voltages[0])
-        elif EV==2:
-            charging_voltage.append(charge_voltages[1])
-        elif EV==3:
-            charging_voltage.append(charge_voltages[2])
-        else:
-            charging_voltage.append(0)
-
-    return charging_voltage
-
-
-def estimate_SOC(charging_V, charging_A):
-    '''
-    The charger has no direct knowledge of the SOC of the EV battery it
-    is charging but instead must estimate it based on the effective resistance
-    of the battery which is calculated from the applied charging voltage and
-    measured charging current. The effective resistance model is used here is
-    identical to that of the actual battery; if both the charging voltage
-    and current were measured perfectly the SOC estimate here would exactly
-    match the true SOC modeled by the battery. For fun, though, a small
-    amount of Gaussian noise is added to the current value. This noise
-    creates larger errors as the charging current goes down (EV battery
-    reaching full SOC).
-
-    :param charging_V: Applied charging voltage
-    :param charging_A: Charging current as passed back by the battery federate
-    :return: SOC estimate
-    '''
-    socs = np.array([0, 1])
-    effective_R = np.array([8, 150])
-    mu = 0
-    sigma = 0.2
-    noise = np.random.normal(mu, sigma)
-    measured_A = charging_A + noise
-    measured_R = charging_V / measured_A
-    SOC_estimate = np.interp(measured_R, effective_R, socs)
-
-    return SOC_estimate
-
-
 if __name__ == "__main__":
-    np.random.seed(1490)
+    rng = np.random.default_rng(1490)
 
     ##############  Registering  federate from json  ##########################
     fed = h.helicsCreateCombinationFederateFromConfig("ChargerConfig.json")
@@ -188,9 +133,8 @@ if __name__ == "__main__":
     # Generate an initial fleet of EVs, one for each previously defined
     #   endpoint. This gives each EV a unique link to the EV controller
     #   federate.
-    numLvl1,numLvl2,numLvl3,EVlist = get_new_EV(end_count)
-    charging_voltage = calc_charging_voltage(EVlist)
-    currentsoc = {}
+    numLvl1,numLvl2,numLvl3,EVlist = get_new_EV(end_count, rng)
+    bank = ChargerBank(EVlist, rng)
 
     # Data collection lists
     time_sim = []
@@ -205,7 +149,7 @@ if __name__ == "__main__":
 
     # Apply initial charging voltage
     for j in range(0, pub_count):
-        h.helicsPublicationPublishDouble(pubid[j], charging_voltage[j])
+        h.helicsPublicationPublishDouble(pubid[j], bank.voltage[j])
 
 
     # Once granted an initial time, send the initial SOCs to the EV
@@ -227,32 +171,34 @@ if __name__ == "__main__":
         grantedtime = h.helicsFederateRequestTime (fed, requested_time)
         logger.debug(f'Granted time {grantedtime}')
 
-        for j in range(0,end_count):
+        # Model the physics of the battery charging. This happens
+        #   every time step whether a message comes in or not and always
+        #   uses the latest value provided by the battery model.
+        charging_current = np.array([h.helicsInputGetDouble(subid[j])
+                                     for j in range(0, end_count)])
+
+        # SOC estimation
+        bank.estimate_SOC(charging_current)
 
+        # New EV is in place after removing charge from old EV,
+        # as indicated by the zero current draw.
+        new_EV = charging_current == 0
+        num_new = int(np.count_nonzero(new_EV))
+        if num_new:
+            _, _, _, newEVtypes = get_new_EV(num_new, rng)
+            bank.replace(new_EV, newEVtypes)
+
+        for j in range(0,end_count):
             logger.debug(f'EV {j+1} time {grantedtime}')
-            # Model the physics of the battery charging. This happens
-            #   every time step whether a message comes in or not and always
-            #   uses the latest value provided by the battery model.
-            charging_current = h.helicsInputGetDouble((subid[j]))
-            logger.debug(f'\tCharging current: {charging_current:.2f} from '
+            logger.debug(f'\tCharging current: {charging_current[j]:.2f} from '
                          f'input {h.helicsSubscriptionGetTarget(subid[j])}')
 
-            # New EV is in place after removing charge from old EV,
-            # as indicated by the zero current draw.
-            if charging_current == 0:
-                _, _, _, newEVtype = get_new_EV(1)
-                EVlist[j] = newEVtype[0]
-                charge_V = calc_charging_voltage(newEVtype)
-                charging_voltage[j] = charge_V[0]
-
-                currentsoc[j] = 0 # Initial SOC estimate
-                logger.debug(f'\tNew EV, SOC estimate: {currentsoc[j]:.4f}')
+            if new_EV[j]:
+                logger.debug(f'\tNew EV, SOC estimate: {bank.soc_estimate[j]:.4f}')
                 logger.debug(f'\tNew EV, charging voltage:'
-                             f' {charging_voltage[j]}')
+                             f' {bank.voltage[j]}')
             else:
-                # SOC estimation
-                currentsoc[j] = estimate_SOC(charging_voltage[j], charging_current)
-                logger.debug(f'\tEV SOC estimate: {currentsoc[j]:.4f}')
+                logger.debug(f'\tEV SOC estimate: {bank.soc_estimate[j]:.4f}')
 
 
 
@@ -273,7 +219,7 @@ if __name__ == "__main__":
                 #   do something if the controller says to stop
                 if int(instructions) == 0:
                     # Stop charing this EV
-                    charging_voltage[j] = 0
+                    bank.voltage[j] = 0
                     logger.info(f'\tEV full; removing charging voltage')
             else:
                 logger.debug(f'\tNo messages at endpoint {endpoint_name} '
@@ -281,8 +227,8 @@ if __name__ == "__main__":
                              f'time {grantedtime}')
 
             # Publish updated charging voltage
-            h.helicsPublicationPublishDouble(pubid[j], charging_voltage[j])
-            logger.debug(f'\tPublishing charging voltage of {charging_voltage[j]} '
+            h.helicsPublicationPublishDouble(pubid[j], bank.voltage[j])
+            logger.debug(f'\tPublishing charging voltage of {bank.voltage[j]} '
                          f' at time {grantedtime}')
 
             # Send message to Controller with SOC every 15 minutes
@@ -290,18 +236,16 @@ if __name__ == "__main__":
                 destination_name = str(
                     h.helicsEndpointGetDefaultDestination(endid[j]))
                 h.helicsEndpointSendMessageRaw(endid[j], "",
-                                               f'{currentsoc[j]:4f}'.encode(
+                                               f'{bank.soc_estimate[j]:4f}'.encode(
                                                ))  #
                 logger.debug(f'\tSent message from endpoint {endpoint_name}'
                              f' at time {grantedtime}'
-                             f' with payload SOC {currentsoc[j]:4f}')
+                             f' with payload SOC {bank.soc_estimate[j]:4f}')
 
         # Calculate the total power required by all chargers. This is the
         #   primary metric of interest, to understand the power profile
         #   and capacity requirements required for this charging garage.
-        total_power = 0
-        for j in range(0,end_count):
-            total_power += charge_rate[(EVlist[j]-1)]
+        total_power = np.sum(np.array(charge_rate)[bank.levels - 1])
 
         # Data collection vectors
         time_sim.append(grantedtime)
@@ -29,6 +29,7 @@ import os
 import sys
 
 
+import heapq
 import helics as h
 import random
 from operator import itemgetter
@@ -100,12 +101,95 @@ def configure_federate():
     return fed, endid, end_name
 
 
-def filter_drop_delay(eq, drop_rate, delay_time):
+class EventQueue:
+    """Priority queue of the messages being held by the filter federate.
+
+    Messages are kept in a binary heap ordered by delivery time so adding
+    a message and removing the next one to be delivered are both
+    O(log n). Messages with the same delivery time come out in the order
+    they were added.
+
+    Each message is also filed in a time bucket of width bucket_width so
+    the messages close in time to the next one to be delivered (the only
+    ones that can interfere with it) can be found without walking the
+    whole queue. Messages removed from the middle of the heap are marked
+    rather than deleted and are skipped when they reach the top.
+
+    Args:
+        bucket_width (float) - Width of the time buckets; ideally the
+        interference threshold time.
+    """
+    _REMOVED = None
+
+    def __init__(self, bucket_width):
+        self.bucket_width = bucket_width
+        self._heap = []
+        self._buckets = {}
+        self._entries = {}
+        self._count = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __bool__(self):
+        return len(self._entries) > 0
+
+    def _bucket(self, time):
+        return int(time // self.bucket_width)
+
+    def _prune(self):
+        # Discard removed entries sitting at the top of the heap
+        while self._heap and self._heap[0][2] is self._REMOVED:
+            heapq.heappop(self._heap)
+
+    def push(self, msg_dict):
+        entry = [msg_dict['time'], self._count, msg_dict]
+        self._count += 1
+        heapq.heappush(self._heap, entry)
+        self._buckets.setdefault(self._bucket(entry[0]), []).append(entry)
+        self._entries[id(msg_dict)] = entry
+
+    def peek(self):
+        self._prune()
+        return self._heap[0][2]
+
+    def pop(self):
+        msg_dict = self.peek()
+        self.remove(msg_dict)
+        self._prune()
+        return msg_dict
+
+    def remove(self, msg_dict):
+        entry = self._entries.pop(id(msg_dict))
+        bucket = self._bucket(entry[0])
+        self._buckets[bucket].remove(entry)
+        if not self._buckets[bucket]:
+            del self._buckets[bucket]
+        entry[2] = self._REMOVED
+
+    def window(self, span):
+        """Messages (other than the next one to be delivered) whose
+        delivery time is less than span after that of the next message,
+        in delivery order.
+        """
+        self._prune()
+        if not self._heap:
+            return []
+        head = self._heap[0]
+        first = self._bucket(head[0])
+        last = self._bucket(head[0] + span)
+        entries = []
+        for bucket in range(first, last + 1):
+            for entry in self._buckets.get(bucket, []):
+                if entry is not head and entry[0] - head[0] < span:
+                    entries.append(entry)
+        entries.sort(key=itemgetter(0, 1))
+        return [entry[2] for entry in entries]
+
+
+def filter_drop_delay(msg_dict, drop_rate, delay_time):
     if random.random() > 0.1:
         logger.debug(f'\t\t\tMessage not randomly dropped')
-        # Pulling incoming message from its parking spot at the end of eq
-        msg_dict = eq[-1]
-        del eq[-1]
         # Only need to delay messages that are not dropped
         # Messages are normally sent every 900 seconds
         # Larger range of random int results in greater disturbance to control mechanism
@@ -116,114 +200,73 @@ def filter_drop_delay(eq, drop_rate, delay_time):
         transmit_time = msg_dict['time'] + delay
         h.helicsMessageSetTime(msg_dict['msg_obj'], transmit_time)
         msg_dict['time'] = transmit_time
-        eq.append(msg_dict)
         logger.debug(f'\t\t\tMessage from endpoint {msg_dict["source"]}'
                      f' to endpoint {msg_dict["dest"]}'
                      f' delayed to time {msg_dict["time"]} seconds'
                      f' with payload \"{msg_dict["payload"]}\"')
+        return msg_dict
     else:
-        # Because the message is dropped, we remove it from the end of th eq
-        del eq[-1]
+        # Because the message is dropped, it never makes it into the eq
         logger.debug(f'\t\t\tMessage randomly dropped')
-    return eq
-    
+        return None
 
 
 
-def filter_hack(eq, hack_success_rate):
+
+def filter_hack(msg_dict, hack_success_rate):
     if random.random() < hack_success_rate:
         logger.debug(f'\t\t\tMessage hacked')
-        # Pulling incoming message from its parking spot at the end of eq
-        msg_dict = eq[-1]
-        del eq[-1]
         if msg_dict['payload'] == '0':
             msg_dict['payload'] = '1'
         else:
             msg_dict['payload'] = '0'
         h.helicsMessageSetString(msg_dict['msg_obj'], msg_dict['payload'])
-        eq.append(msg_dict)
         logger.debug(f'\t\t\tMessage from endpoint {msg_dict["source"]}'
                      f' to endpoint {msg_dict["dest"]}'
                      f' had payload altered to {msg_dict["payload"]}')
     else:
         logger.debug(f'\t\t\tMessage not hacked')
-    return eq
+    return msg_dict
 
 
 def filter_interfere(eq, interference_threshold_time):
     threshold = interference_threshold_time
-    event_time = eq[0]['time']
-    delete_idx = []
-
-    # Interference can only happen if there is more than one message
-    #   in the event queue
-    if len(eq) > 1:
-        for idx, e in enumerate(eq):
-            logger.debug(f'\t\t\tComparing primary message to message from'
-                        f' {e["source"]} going to {e["dest"]}')
-            # Don't check for interference between the primary message
-            #   (`event` = eq[0]) and itself.
-            if idx > 0:
-                dt = e['time'] - event_time
-                logger.debug(f'\t\t\t\tTime delta between messages: {dt}')
-                
-                if dt < 0:
-                    logger.warning(f'\t\t\t\teq appears unordered:'
-                                   f'\n\t\t\t\teq[0]["time"] = {event_time}'
-                                   f'\n\t\t\t\teq[{idx}]["time"] = {e["time"]}')
-                if dt < threshold:
-                    logger.debug(f'\t\t\t\t{dt} is less than interference '
-                                 f'threshold ({threshold}) and is '
-                                 f'interfering')
-                    # If the list is empty, add the primary event as the
-                    #   to the delete_list. That is, the primary message
-                    #   and the next message in eq (eq[1]) are interfering
-                    #   with each other.
-                    if not delete_idx:
-                        delete_idx.append(0)
-                        logger.debug(f'\t\t\t\tScheduling message for deletion: '
-                                     f'eq[0]')
-                    delete_idx.append(idx)
-                    logger.debug(f'\t\t\t\tScheduling message for deletion: '
-                                 f'eq[{idx}]')
-                else:
-                    logger.debug(f'\t\t\t\tTime delta of {dt} is greater than'
-                                f' max interference time of'
-                                f' {interference_threshold_time}.')
-                    break
-
-        # Deleting events from the eq that are causing interference
-        #   Work from the largest idx to the smallest so the index
-        #   values we care about don't change as the events are removed
-        #   from eq
-        delete_idx.sort(reverse=True)
-        for i in delete_idx:
+    event = eq.peek()
+
+    # Only messages in the same or following time bucket as the primary
+    #   message (`event`, the next to be delivered) can be close enough
+    #   in time to interfere with it.
+    interfering = eq.window(threshold)
+    for e in interfering:
+        logger.debug(f'\t\t\t{e["time"] - event["time"]} is less than '
+                     f'interference threshold ({threshold}); message from'
+                     f' {e["source"]} going to {e["dest"]} is interfering')
+
+    # If any messages interfere with the primary message, the primary
+    #   message and all the messages interfering with it are deleted.
+    if interfering:
+        for e in [event] + interfering:
             logger.debug(f'\t\t\tDeleting message from queue:'
-                         f'\t\t\t\tsource: {eq[i]["source"]}'
-                         f'\t\t\t\tdestination: {eq[i]["dest"]}'
-                         f'\t\t\t\tpayload: {eq[i]["payload"]}'
-                         f'\t\t\t\tdelivery time: {eq[i]["time"]}')
-            del eq[i]
+                         f'\t\t\t\tsource: {e["source"]}'
+                         f'\t\t\t\tdestination: {e["dest"]}'
+                         f'\t\t\t\tpayload: {e["payload"]}'
+                         f'\t\t\t\tdelivery time: {e["time"]}')
+            eq.remove(e)
             logger.debug(f'\t\t\teq length: {len(eq)}')
     return eq
 
 
-def filter_message(eq, cmd, args):
+def filter_message(msg_dict, cmd, args):
     if cmd == 'drop_delay':
         logger.debug(f'\t\tPerforming filter operation drop and delay')
-        eq = filter_drop_delay(eq, args.drop_rate, args.delay_time)
+        msg_dict = filter_drop_delay(msg_dict, args.drop_rate, args.delay_time)
     elif cmd == 'hack':
         logger.debug(f'\t\tPerforming filter operation hack')
-        eq = filter_hack(eq, args.hack_success_rate)
-        pass
-    elif cmd == 'interfere':
-        logger.debug(f'\t\tPerforming filter operation interfere')
-        eq = filter_interfere(eq, args.interference_threshold_time)
-        #pass
+        msg_dict = filter_hack(msg_dict, args.hack_success_rate)
     else:
         logger.warning(f'Unrecognized command: {cmd}'
-                       f' event queue unmodified')
-    return eq
+                       f' message unmodified')
+    return msg_dict
 
 
 def run_cosim(fed, endid, end_name, args):
@@ -238,9 +281,11 @@ def run_cosim(fed, endid, end_name, args):
     #   When eq is empty, there are no messages being
     #   filtered by the federate. When there are events in the queue it
     #   indicates the filter federate has messages it is holding onto
-    #   that it needs to forward on (at the indicated time).
+    #   that it needs to forward on (at the indicated time). The queue
+    #   always hands back the message with the earliest delivery time
+    #   first.
     #
-    eq = []
+    eq = EventQueue(args.interference_threshold_time)
 
 
     logger.info('Attempting to enter execution mode')
@@ -277,44 +322,42 @@ def run_cosim(fed, endid, end_name, args):
                         'source':source,
                         'dest':dest,
                         'time':time}
-            # Adding messagge to end of eq as a reserved place for all
-            # filters to act on.
-            eq.append(msg_dict)
-            eq = filter_message(eq, 'drop_delay', args)
-            if source == 'Controller/ep':
-                eq = filter_message(eq, 'hack', args)
-
-        # Sort event queue to get it back in order
-        eq = sorted(eq, key=itemgetter('time'))
+            # Running the message through the filters before it is added
+            #   to eq; a dropped message never makes it into the queue.
+            msg_dict = filter_message(msg_dict, 'drop_delay', args)
+            if msg_dict is not None:
+                if source == 'Controller/ep':
+                    msg_dict = filter_message(msg_dict, 'hack', args)
+                eq.push(msg_dict)
 
         # Acting on any events that need to be dequeued
         # Running interference filter. This filter has the ability to
         #   remove events from eq. We may not have any messages to send
-        #   after interference runs. eq must be freshly sorted for this
-        #   filter to work.
-        if len(eq) > 0:
-            eq = filter_message(eq, 'interfere', args)
+        #   after interference runs.
+        if eq:
+            logger.debug(f'\t\tPerforming filter operation interfere')
+            eq = filter_interfere(eq, args.interference_threshold_time)
 
             # After filtering, send all messages whose time has come (or past;
             #   in which case something has gone wrong)
-            while eq and eq[0]['time'] <= grantedtime:
+            while eq and eq.peek()['time'] <= grantedtime:
+                event = eq.pop()
                 # Change destination to original destination before sending
                 #   If you don't do this is sends the message back to the rerouted
                 #   destination which, in this case, is the filter endpoint.
-                h.helicsMessageSetDestination(eq[0]['msg_obj'], eq[0]["dest"])
-                h.helicsEndpointSendMessage(endid, eq[0]['msg_obj'])
+                h.helicsMessageSetDestination(event['msg_obj'], event["dest"])
+                h.helicsEndpointSendMessage(endid, event['msg_obj'])
                 logger.debug(f'\tSent message from endpoint {end_name}'
-                             f' appearing to come from {eq[0]["source"]}'
-                             f' to endpoint {eq[0]["dest"]}'
+                             f' appearing to come from {event["source"]}'
+                             f' to endpoint {event["dest"]}'
                              f' at time {grantedtime}'
-                             f' with payload \"{eq[0]["payload"]}\"')
-                del eq[0]
+                             f' with payload \"{event["payload"]}\"')
 
             if eq:
                 # Event queue not empty, need to schedule filter federate to
                 #   run again when its time to deliver the next message in the
                 #   queue
-                requested_time = eq[0]['time']
+                requested_time = eq.peek()['time']
             else:  
                 # Reachable if interference has removed all the messages
                 #   from the event queue.
@@ -353,6 +396,19 @@ def _auto_run(args):
     destroy_federate(fed)
 
 
+def positive_float(value):
+    '''
+    argparse type for options that must be a number greater than zero.
+    '''
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{value!r} is not a number')
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f'{value!r} must be greater than 0')
+    return number
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Demo HELICS filter federate')
     # Have to do a little bit of work to generate a good default
@@ -382,7 +438,9 @@ if __name__ == '__main__':
                         default=0.02)
     parser.add_argument('-i',
                         '--interference_threshold_time',
-                        nargs='?',
-                        default=200)
+                        type=positive_float,
+                        default=200,
+                        help='width (s) of the time buckets in which '
+                             'messages interfere')
     args = parser.parse_args()
     _auto_run(args)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Vectorized model of the bank of charging terminals managed by a single
+Charger federate. The charging level, applied voltage, measured current
+and SOC estimate of every terminal are held in NumPy arrays so each time
+step is a handful of array operations rather than a Python loop over the
+EVs, and all the random numbers (measurement noise) for a time step are
+drawn in a single call to one numpy Generator.
+"""
+import numpy as np
+
+
+# Charging voltage for each charging level (1, 2, 3); anything else (0)
+#   gets no voltage. Ignoring the difference between AC and DC voltages
+#   for this application.
+CHARGE_VOLTAGES = np.array([0, 120, 240, 630], dtype=float)
+
+
+def charging_voltage(levels):
+    '''
+    Maps charging levels to standard (more or less) charging voltages.
+
+    :param levels: Array of charging levels (1, 2 or 3)
+    :return: Array of charging voltages
+    '''
+    levels = np.asarray(levels, dtype=int)
+    return CHARGE_VOLTAGES[np.where((levels >= 1) & (levels <= 3), levels, 0)]
+
+
+class ChargerBank:
+    '''
+    State of a bank of EV charging terminals.
+
+    :param levels: Charging level of the EV at each terminal (1, 2 or 3)
+    :param rng: numpy Generator used for the current measurement noise
+    :param socs: SOC breakpoints of the effective resistance table
+    :param effective_R: Effective resistance (ohms) at each SOC breakpoint
+    :param sigma: Standard deviation of the current measurement noise (A)
+    '''
+    def __init__(self, levels, rng, socs=(0, 1), effective_R=(8, 150),
+                 sigma=0.2):
+        self.rng = rng
+        self.levels = np.array(levels, dtype=int)
+        self.voltage = charging_voltage(self.levels)
+        self.current = np.zeros(len(self.levels))
+        self.soc_estimate = np.zeros(len(self.levels))
+        self.socs = np.array(socs, dtype=float)
+        self.effective_R = np.array(effective_R, dtype=float)
+        self.sigma = sigma
+
+    def __len__(self):
+        return len(self.levels)
+
+    def estimate_SOC(self, current, index=None):
+        '''
+        The charger has no direct knowledge of the SOC of the EV batteries
+        it is charging but instead must estimate it based on the effective
+        resistance of each battery, calculated from the applied charging
+        voltage and the measured charging current. The effective resistance
+        model is identical to that of the actual battery but a small amount
+        of Gaussian noise is added to the measured current, creating larger
+        errors as the charging current goes down (battery reaching full SOC).
+
+        :param current: Charging current of each EV as passed back by the
+            battery federate (A)
+        :param index: Indices of the terminals to estimate (e.g. those
+            with an EV charging); by default all. The estimates of the
+            others are left as they are.
+        :return: Array of SOC estimates of every terminal
+        '''
+        self.current = np.array(current, dtype=float)
+        i = slice(None) if index is None else index
+        current = self.current[i]
+        measured_A = current + self.rng.normal(0, self.sigma, len(current))
+        measured_R = self.voltage[i] / measured_A
+        self.soc_estimate[i] = np.interp(measured_R, self.effective_R, self.socs)
+        return self.soc_estimate
+
+    def replace(self, mask, levels):
+        '''
+        Moves new EVs into the terminals selected by mask, applying the
+        charging voltage for their level and resetting their SOC estimate.
+
+        :param mask: Boolean mask (or index array) of terminals with new EVs
+        :param levels: Charging levels of the new EVs
+        :return: (none)
+        '''
+        self.levels[mask] = levels
+        self.voltage[mask] = charging_voltage(levels)
+        self.soc_estimate[mask] = 0
+
+    def power(self):
+        '''
+        :return: Total power drawn by all the terminals (W)
+        '''
+        return float(np.dot(self.voltage, self.current))
@@ -5,7 +5,7 @@ Created on Thu Oct 11 10:08:26 2018
 @author: monish.mukherjee
 """
 import scipy.io as spio
-from pypower.api import case118, ppoption, runpf, runopf
+from pypower.api import case118, ppoption, runopf
 import math
 import numpy
 import matplotlib.pyplot as plt
@@ -14,6 +14,10 @@ import helics as h
 import random
 import logging
 
+from powerflow import PowerFlow
+from recorder import Recorder
+from telemetry import Telemetry
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler())
 logger.setLevel(logging.DEBUG)
@@ -44,6 +48,41 @@ def destroy_federate(fed):
     h.helicsCloseLibrary()
 
 
+class TransmissionView:
+    """Live plot of the co-sim bus, drawn by the telemetry viewer process"""
+
+    def __init__(self):
+        fig = plt.figure()
+        self.ax1 = fig.add_subplot(2, 1, 1)
+        self.ax2 = fig.add_subplot(2, 1, 2)
+        self.pf_time = []
+        self.voltage = []
+        self.demand = []
+
+    def update(self, sample):
+        pf_time, voltage, demand = sample
+        self.pf_time.append(pf_time)
+        self.voltage.append(voltage)
+        self.demand.append(demand)
+
+    def draw(self):
+        if len(self.pf_time) < 2:
+            return
+        ax1, ax2 = self.ax1, self.ax2
+        ax1.clear()
+        ax1.plot(self.pf_time, self.voltage, "r--")
+        ax1.set_xlim([0, 25])
+        ax1.set_ylabel("Voltage [in kV]")
+        ax1.set_xlabel("Time [in hours]")
+        ax2.clear()
+        ax2.plot(self.pf_time, self.demand, "k")
+        ax2.set_xlim([0, 25])
+        ax2.set_ylabel("Load from distribution [in MW]")
+        ax2.set_xlabel("Time [in hours]")
+        ax1.grid()
+        ax2.grid()
+
+
 if __name__ == "__main__":
 
     #broker = create_broker()
@@ -82,6 +121,8 @@ if __name__ == "__main__":
     grantedtime = -1
     pf_interval    = 5 * 60  # in seconds (minimim_resolution) ## Adjust this to change PF intervals
     acopf_interval = 15 * 60  # in seconds (minimim_resolution) ## Adjust this to change ACOPF intervals
+    plotting = True  ## Adjust this flag to visualize the co-sim bus as the simulation progresses
+    spill_to_disk = False  # keep the recorded results in .npy files rather than in memory (for long runs)
     random.seed(0)
 
     peak_demand = []
@@ -126,14 +167,24 @@ if __name__ == "__main__":
     load_amplification_factor = 15
 
     # power_flow
-    fig = plt.figure()
-    ax1 = fig.add_subplot(2, 1, 1)
-    ax2 = fig.add_subplot(2, 1, 2)
-    voltage_plot = []
+    if plotting:
+        telemetry = Telemetry(TransmissionView)
+    n_bus = len(ppc["bus"])
+    pf_steps = len(time_pf)
+    opf_steps = len(time_opf)
+    voltages = Recorder(pf_steps, n_bus, "Transmission_Voltages.npy" if spill_to_disk else None)
+    real_demand = Recorder(pf_steps, n_bus, "Transmission_MW_demand.npy" if spill_to_disk else None)
+    LMP_solved = Recorder(opf_steps, n_bus, "Transmission_LMP.npy" if spill_to_disk else None)
+    distribution_load = []
     x = 0
     k = 0
     voltage_cosim_bus = (ppc["bus"][cosim_bus, 7] * ppc["bus"][cosim_bus, 9]) * 1.043
 
+    # Ybus and the Jacobian structure are built once and each power flow
+    #   starts from the previous solution
+    ppopt = ppoption(PF_ALG=1, OUT_ALL=0, VERBOSE=1)
+    power_flow = PowerFlow(ppc, ppopt)
+
     #########################################   Starting Co-simulation  ####################################################
 
     for t in range(0, total_inteval, pf_interval):
@@ -164,7 +215,6 @@ if __name__ == "__main__":
         ppc["bus"][:, 3] = actual_demand * math.tan(math.acos(0.85))
         ppc["bus"][cosim_bus, 2] = rload * load_amplification_factor / 1000000
         ppc["bus"][cosim_bus, 3] = iload * load_amplification_factor / 1000000
-        ppopt = ppoption(PF_ALG=1, OUT_ALL=0, VERBOSE=1)
 
         logger.info("{}: Current AC-PF TIme is {} and Next AC-OPF time is {}".format(federate_name, time_pf[x], time_opf[k]))
 
@@ -175,62 +225,38 @@ if __name__ == "__main__":
             if results_opf["success"]:
                 ppc["bus"] = results_opf["bus"]
                 ppc["gen"] = results_opf["gen"]
-                if k == 0:
-                    LMP_solved = results_opf["bus"][:, 13]
-                else:
-                    LMP_solved = numpy.vstack((LMP_solved, results_opf["bus"][:, 13]))
-                    opf_time = time_opf[0 : k + 1] / 3600
+                LMP_solved.append(time_opf[k] / 3600, results_opf["bus"][:, 13])
             k = k + 1
 
         ################################  Running PF For optimal power flow intervals   ##############################
 
-        solved_pf = runpf(ppc, ppopt)
-        results_pf = solved_pf[0]
+        results_pf = power_flow.run(ppc)
         ppc["bus"] = results_pf["bus"]
         ppc["gen"] = results_pf["gen"]
 
         if results_pf["success"] == 1:
-            if x == 0:
-                voltages = results_pf["bus"][:, 7]
-                real_demand = results_pf["bus"][:, 2]
-                distribution_load = [rload / 1000000]
-            else:
-                voltages = numpy.vstack((voltages, results_pf["bus"][:, 7]))
-                real_demand = numpy.vstack((real_demand, results_pf["bus"][:, 2]))
-                distribution_load.append(rload / 1000000)
-                pf_time = time_pf[0 : x + 1] / 3600
+            voltages.append(time_pf[x] / 3600, results_pf["bus"][:, 7])
+            real_demand.append(time_pf[x] / 3600, results_pf["bus"][:, 2])
+            distribution_load.append(rload / 1000000)
 
             voltage_cosim_bus = results_pf["bus"][cosim_bus, 7] * results_pf["bus"][cosim_bus, 9]
-            voltage_plot.append(voltage_cosim_bus)
-
-        ######################### Plotting the Voltages and Load of the Co-SIM bus ##############################################
-
-        if x > 0:
-            ax1.clear()
-            ax1.plot(pf_time, voltage_plot, "r--")
-            ax1.set_xlim([0, 25])
-            ax1.set_ylabel("Voltage [in kV]")
-            ax1.set_xlabel("Time [in hours]")
-            ax2.clear()
-            ax2.plot(pf_time, real_demand[:, cosim_bus], "k")
-            ax2.set_xlim([0, 25])
-            ax2.set_ylabel("Load from distribution [in MW]")
-            ax2.set_xlabel("Time [in hours]")
-            ax1.grid()
-            ax2.grid()
-            plt.show(block=False)
-            plt.pause(0.1)
+
+            ######################### Plotting the Voltages and Load of the Co-SIM bus ##########################################
+
+            if plotting:
+                telemetry.send((time_pf[x] / 3600, voltage_cosim_bus, results_pf["bus"][cosim_bus, 2]))
+
         x = x + 1
 
     ##########################   Creating headers and Printing results to CSVs #####################################
 
     head = str("Time(in Hours)")
-    for i in range(voltages.shape[1]):
+    for i in range(n_bus):
         head = head + "," + ("Bus" + str(i + 1))
 
     numpy.savetxt(
         "Transmission_Voltages.csv",
-        numpy.column_stack((pf_time, voltages)),
+        numpy.column_stack((voltages.time, voltages.values)),
         delimiter=",",
         fmt="%s",
         header=head,
@@ -238,7 +264,7 @@ if __name__ == "__main__":
     )
     numpy.savetxt(
         "Transmission_MW_demand.csv",
-        numpy.column_stack((pf_time, real_demand)),
+        numpy.column_stack((real_demand.time, real_demand.values)),
         delimiter=",",
         fmt="%s",
         header=head,
@@ -246,12 +272,14 @@ if __name__ == "__main__":
     )
     numpy.savetxt(
         "Transmission_LMP.csv",
-        numpy.column_stack((opf_time, LMP_solved)),
+        numpy.column_stack((LMP_solved.time, LMP_solved.values)),
         delimiter=",",
         fmt="%s",
         header=head,
         comments="",
     )
+    for recorder in (voltages, real_demand, LMP_solved):
+        recorder.flush()
 
     ##############################   Terminating Federate   ########################################################
     t = 60 * 60 * 24
@@ -259,4 +287,6 @@ if __name__ == "__main__":
         grantedtime = h.helicsFederateRequestTime(fed, t)
     logger.info("{}: Destroying federate".format(federate_name))
     destroy_federate(fed)
+    if plotting:
+        telemetry.close()
     logger.info("{}: Done!".format(federate_name))
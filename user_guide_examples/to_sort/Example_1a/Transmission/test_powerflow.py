@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Checks of the cached power flow session in powerflow.py against PYPOWER.
+"""
+from copy import deepcopy
+
+import numpy
+from pypower.api import runpf
+from pypower.case118 import case118
+from pypower.idx_bus import PD, QD, VA, VM
+from pypower.ppoption import ppoption
+from scipy.sparse.linalg import splu
+
+from powerflow import PowerFlow
+
+
+PPOPT = ppoption(VERBOSE=0, OUT_ALL=0)
+
+
+def test_matches_runpf():
+    pf = PowerFlow(case118(), PPOPT)
+    # After the first run the Jacobian is factored with the cached column
+    #   ordering, so the loads change each run to make Newton iterate
+    for scale in [1.0, 1.1, 0.9]:
+        ppc = case118()
+        ppc["bus"][:, [PD, QD]] *= scale
+        results, success = runpf(deepcopy(ppc), PPOPT)
+        assert success
+        solved = pf.run(ppc)
+        assert solved["success"]
+        assert solved["iterations"] > 0
+        assert numpy.allclose(solved["bus"][:, VM], results["bus"][:, VM], atol=1e-6)
+        assert numpy.allclose(solved["bus"][:, VA], results["bus"][:, VA], atol=1e-5)
+
+
+def test_reordered_jacobian_keeps_fill():
+    pf = PowerFlow(case118(), PPOPT)
+    pf.run(case118())
+    # The Jacobian in its natural column order, ordered by SuperLU itself
+    pf._order_jacobian(numpy.arange(pf._jac_size))
+    J = pf._jacobian(pf.V)
+    lu = splu(J)
+    pf._perm_c = lu.perm_c
+    pf._order_jacobian(pf._perm_c)
+    J_reordered = pf._jacobian(pf.V)
+    lu_natural = splu(J_reordered, permc_spec="NATURAL")
+    assert lu_natural.L.nnz + lu_natural.U.nnz == lu.L.nnz + lu.U.nnz
+
+    F = numpy.random.default_rng(0).random(J.shape[0])
+    assert numpy.allclose(pf._solve(J_reordered, F), lu.solve(F))
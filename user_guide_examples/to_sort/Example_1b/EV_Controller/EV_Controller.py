@@ -11,6 +11,7 @@ import logging
 import pandas as pd
 import numpy as np
 
+from telemetry import Telemetry
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler())
@@ -23,6 +24,55 @@ def destroy_federate(fed):
     h.helicsCloseLibrary()
 
 
+class EVView:
+    """Live plot of the feeder load and EV outputs, drawn by the telemetry viewer process"""
+
+    def __init__(self, feeder_limit_upper, feeder_limit_lower):
+        self.feeder_limit_upper = feeder_limit_upper
+        self.feeder_limit_lower = feeder_limit_lower
+        self.time_sim = []
+        self.feeder_real_power = []
+        self.EV_data = {}
+        self.ax = {}
+        fig = plt.figure()
+        fig.subplots_adjust(hspace=0.4, wspace=0.4)
+        self.ax['Feeder'] = plt.subplot(313)
+        self.ax['EV1'] = plt.subplot(331)
+        self.ax['EV2'] = plt.subplot(332)
+        self.ax['EV3'] = plt.subplot(333)
+        self.ax['EV4'] = plt.subplot(334)
+        self.ax['EV5'] = plt.subplot(335)
+        self.ax['EV6'] = plt.subplot(336)
+
+    def update(self, sample):
+        t, feeder_power, EV_now = sample
+        self.time_sim.append(t)
+        self.feeder_real_power.append(feeder_power)
+        for EV_name, value in EV_now.items():
+            if EV_name not in self.EV_data:
+                self.EV_data[EV_name] = []
+            self.EV_data[EV_name].append(value)
+
+    def draw(self):
+        ax = self.ax
+        ax['Feeder'].clear()
+        ax['Feeder'].plot(self.time_sim, self.feeder_real_power)
+        ax['Feeder'].plot(np.linspace(0,24,25), self.feeder_limit_upper*np.ones(25), 'r--')
+        ax['Feeder'].plot(np.linspace(0,24,25), self.feeder_limit_lower*np.ones(25), 'g--')
+        ax['Feeder'].set_ylabel("Feeder Load (kW)")
+        ax['Feeder'].set_xlabel("Time (Hrs)")
+        ax['Feeder'].set_xlim([0, 24])
+        ax['Feeder'].grid()
+        for keys in self.EV_data:
+            ax[keys].clear()
+            ax[keys].plot(self.time_sim, self.EV_data[keys])
+            ax[keys].set_ylabel("EV Output (kW)")
+            ax[keys].set_xlabel("Time (Hrs)")
+            ax[keys].set_title(keys)
+            ax[keys].set_xlim([0, 24])
+            ax[keys].grid()
+
+
 if __name__ == "__main__":
 
     #################################  Registering  federate from json  ########################################
@@ -65,16 +115,7 @@ if __name__ == "__main__":
 
 
     if plotting:
-        ax ={}
-        fig = plt.figure()
-        fig.subplots_adjust(hspace=0.4, wspace=0.4)
-        ax['Feeder'] = plt.subplot(313)
-        ax['EV1'] = plt.subplot(331)
-        ax['EV2'] = plt.subplot(332)
-        ax['EV3'] = plt.subplot(333)
-        ax['EV4'] = plt.subplot(334)
-        ax['EV5'] = plt.subplot(335)
-        ax['EV6'] = plt.subplot(336)
+        telemetry = Telemetry(EVView, feeder_limit_upper, feeder_limit_lower)
 
 
     for t in range(0, total_inteval, update_interval):
@@ -138,24 +179,8 @@ if __name__ == "__main__":
                 logger.info("{}: All EVs are turned on".format(federate_name))
 
         if plotting:
-            ax['Feeder'].clear()
-            ax['Feeder'].plot(time_sim, feeder_real_power)
-            ax['Feeder'].plot(np.linspace(0,24,25), feeder_limit_upper*np.ones(25), 'r--')
-            ax['Feeder'].plot(np.linspace(0,24,25), feeder_limit_lower*np.ones(25), 'g--')
-            ax['Feeder'].set_ylabel("Feeder Load (kW)")
-            ax['Feeder'].set_xlabel("Time (Hrs)")
-            ax['Feeder'].set_xlim([0, 24])
-            ax['Feeder'].grid()
-            for keys in EV_data:
-                ax[keys].clear()
-                ax[keys].plot(time_sim, EV_data[keys])
-                ax[keys].set_ylabel("EV Output (kW)")
-                ax[keys].set_xlabel("Time (Hrs)")
-                ax[keys].set_title(keys)
-                ax[keys].set_xlim([0, 24])
-                ax[keys].grid()
-            plt.show(block=False)
-            plt.pause(0.01)
+            telemetry.send((time_sim[-1], feeder_real_power[-1],
+                            {EV_name: values[-1] for EV_name, values in EV_data.items()}))
 
     EV_data["time"] = time_sim
     EV_data["feeder_load"] = feeder_real_power
@@ -166,3 +191,5 @@ if __name__ == "__main__":
         grantedtime = h.helicsFederateRequestTime(fed, t)
     logger.info("{}: Destroying federate".format(federate_name))
     destroy_federate(fed)
+    if plotting:
+        telemetry.close()
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+AC power flow session for the Transmission federate. Between two power
+flows in the co-simulation only the bus loads and the generator dispatch
+change, not the network, so everything runpf() rebuilds on every call
+that only depends on the network is built once here and reused:
+
+    - the bus admittance matrix (Ybus, Yf, Yt) and the bus type index sets
+    - the sparsity pattern of the Newton-Raphson Jacobian, along with the
+      mapping from the power derivatives straight into the Jacobian's data
+    - the fill-reducing column ordering of the Jacobian's LU factorization,
+      with the Jacobian laid out in that order so later factorizations skip
+      the COLAMD ordering step (SuperLU still does its symbolic analysis)
+
+Each power flow also starts Newton-Raphson from the previous solution
+rather than from the voltages in the case. If the network does change
+(branch data, bus shunts, bus types or generator status) the cached data
+is rebuilt automatically. Generator reactive power limits are not
+enforced (as with the PYPOWER default); use runpf() for that.
+"""
+import time
+
+import numpy
+from numpy import flatnonzero as find
+from scipy.sparse import csc_matrix, identity
+from scipy.sparse.linalg import splu
+
+from pypower.bustypes import bustypes
+from pypower.idx_brch import BR_STATUS, F_BUS, PF, QF, PT, QT, T_BUS
+from pypower.idx_bus import BS, BUS_I, BUS_TYPE, GS, PQ, VA, VM
+from pypower.idx_gen import GEN_BUS, GEN_STATUS, PG, QG, VG
+from pypower.makeSbus import makeSbus
+from pypower.makeYbus import makeYbus
+from pypower.pfsoln import pfsoln
+from pypower.ppoption import ppoption
+
+
+class PowerFlow:
+    '''
+    :param ppc: PYPOWER case (buses must all be in the case's bus table;
+        they don't need to be numbered consecutively)
+    :param ppopt: PYPOWER options; PF_TOL and PF_MAX_IT are used
+    '''
+    def __init__(self, ppc, ppopt=None):
+        ppopt = ppoption(ppopt)
+        self.tol = ppopt["PF_TOL"]
+        self.max_it = ppopt["PF_MAX_IT"]
+        self.baseMVA = ppc["baseMVA"]
+
+        # External bus numbers to bus table rows and back
+        self._i2e = ppc["bus"][:, BUS_I].astype(int)
+        self._e2i = numpy.zeros(self._i2e.max() + 1, dtype=int)
+        self._e2i[self._i2e] = numpy.arange(len(self._i2e))
+
+        self._network = None
+        self.V = None
+
+    def run(self, ppc):
+        '''
+        Runs an AC power flow (Newton-Raphson) on the case.
+
+        :param ppc: PYPOWER case with the current loads and dispatch
+        :return: Solved case, in the same form as the first value returned
+            by runpf()
+        '''
+        t0 = time.time()
+        bus, gen, branch = self._internal(ppc)
+        if self._network_changed(bus, gen, branch):
+            self._setup(bus, gen, branch)
+
+        # Start from the previous solution, with the generator voltage
+        #   set points and the reference angle from the case
+        if self.V is None:
+            V0 = bus[:, VM] * numpy.exp(1j * numpy.pi / 180 * bus[:, VA])
+        else:
+            V0 = self.V.copy()
+        vc = self._vc_gens
+        V0[self.gbus[vc]] = gen[self.on[vc], VG] / abs(V0[self.gbus[vc]]) * V0[self.gbus[vc]]
+        V0[self.ref] = abs(V0[self.ref]) * numpy.exp(1j * numpy.pi / 180 * bus[self.ref, VA])
+
+        Sbus = makeSbus(self.baseMVA, bus, gen)
+        V, success, iterations = self._newton(Sbus, V0)
+        if success:
+            self.V = V
+
+        bus, gen, branch = pfsoln(self.baseMVA, bus, gen, branch, self.Ybus, self.Yf, self.Yt,
+                                  V, self.ref, self.pv, self.pq)
+        gen[numpy.ix_(find(gen[:, GEN_STATUS] <= 0), [PG, QG])] = 0
+        branch[numpy.ix_(find(branch[:, BR_STATUS] == 0), [PF, QF, PT, QT])] = 0
+
+        results = dict(ppc)
+        results["bus"], results["gen"], results["branch"] = self._external(bus, gen, branch)
+        results["success"] = int(success)
+        results["iterations"] = iterations
+        results["et"] = time.time() - t0
+        return results
+
+    def _internal(self, ppc):
+        bus = ppc["bus"].copy()
+        gen = ppc["gen"].copy()
+        branch = ppc["branch"].copy()
+        if branch.shape[1] < QT + 1:
+            branch = numpy.c_[branch, numpy.zeros((branch.shape[0], QT + 1 - branch.shape[1]))]
+        bus[:, BUS_I] = numpy.arange(len(bus))
+        gen[:, GEN_BUS] = self._e2i[gen[:, GEN_BUS].astype(int)]
+        branch[:, F_BUS] = self._e2i[branch[:, F_BUS].astype(int)]
+        branch[:, T_BUS] = self._e2i[branch[:, T_BUS].astype(int)]
+        return bus, gen, branch
+
+    def _external(self, bus, gen, branch):
+        bus[:, BUS_I] = self._i2e
+        gen[:, GEN_BUS] = self._i2e[gen[:, GEN_BUS].astype(int)]
+        branch[:, F_BUS] = self._i2e[branch[:, F_BUS].astype(int)]
+        branch[:, T_BUS] = self._i2e[branch[:, T_BUS].astype(int)]
+        return bus, gen, branch
+
+    def _network_changed(self, bus, gen, branch):
+        if self._network is None:
+            return True
+        bus_data, gen_data, branch_data = self._network
+        return not (numpy.array_equal(bus[:, [BUS_TYPE, GS, BS]], bus_data)
+                    and numpy.array_equal(gen[:, [GEN_BUS, GEN_STATUS]], gen_data)
+                    and numpy.array_equal(branch[:, :BR_STATUS + 1], branch_data))
+
+    def _setup(self, bus, gen, branch):
+        self._network = (bus[:, [BUS_TYPE, GS, BS]].copy(),
+                         gen[:, [GEN_BUS, GEN_STATUS]].copy(),
+                         branch[:, :BR_STATUS + 1].copy())
+
+        self.ref, self.pv, self.pq = bustypes(bus, gen)
+        self.on = find(gen[:, GEN_STATUS] > 0)
+        self.gbus = gen[self.on, GEN_BUS].astype(int)
+        # In-service generators at voltage controlled (PV and reference) buses
+        self._vc_gens = find(bus[self.gbus, BUS_TYPE] != PQ)
+        self.Ybus, self.Yf, self.Yt = makeYbus(self.baseMVA, bus, branch)
+
+        # The derivatives of the bus power injections have the sparsity
+        #   pattern of Ybus plus its diagonal; work out once where each of
+        #   their entries goes in the Jacobian
+        n = len(bus)
+        pattern = (abs(self.Ybus) + identity(n, format="csr")).tocoo()
+        r, c = pattern.row, pattern.col
+        self._r, self._c = r, c
+        self._y = numpy.asarray(self.Ybus[r, c]).ravel()
+        self._diag = find(r == c)
+        self._diag_bus = r[self._diag]
+
+        pvpq = numpy.r_[self.pv, self.pq]
+        npvpq = len(pvpq)
+        in_pvpq = numpy.zeros(n, dtype=bool)
+        in_pvpq[pvpq] = True
+        in_pq = numpy.zeros(n, dtype=bool)
+        in_pq[self.pq] = True
+        pos = numpy.zeros(n, dtype=int)
+        pos[pvpq] = numpy.arange(npvpq)
+        pos_pq = numpy.zeros(n, dtype=int)
+        pos_pq[self.pq] = npvpq + numpy.arange(len(self.pq))
+
+        # Blocks of the Jacobian: (rows, columns, source) where the
+        #   source is 0/1 for the real parts of dS/dVa / dS/dVm and
+        #   2/3 for their imaginary parts
+        nnz = len(r)
+        rows, cols, src = [], [], []
+        for row_mask, row_pos, col_mask, col_pos, source in (
+                (in_pvpq, pos, in_pvpq, pos, 0),
+                (in_pvpq, pos, in_pq, pos_pq, 1),
+                (in_pq, pos_pq, in_pvpq, pos, 2),
+                (in_pq, pos_pq, in_pq, pos_pq, 3)):
+            e = find(row_mask[r] & col_mask[c])
+            rows.append(row_pos[r[e]])
+            cols.append(col_pos[c[e]])
+            src.append(source * nnz + e)
+        self._jac_rows = numpy.concatenate(rows)
+        self._jac_cols = numpy.concatenate(cols)
+        self._jac_src = numpy.concatenate(src)
+        self._jac_size = npvpq + len(self.pq)
+        self._perm_c = None
+        self._order_jacobian(numpy.arange(self._jac_size))
+
+    def _order_jacobian(self, perm_c):
+        # CSC layout of the Jacobian with its columns in perm_c order,
+        #   i.e. J @ Pc as SuperLU defines it: column j goes to perm_c[j]
+        cols = perm_c[self._jac_cols]
+        order = numpy.lexsort((self._jac_rows, cols))
+        self._jac_data_src = self._jac_src[order]
+        self._jac_indices = self._jac_rows[order]
+        self._jac_indptr = numpy.r_[0, numpy.cumsum(numpy.bincount(cols, minlength=self._jac_size))]
+
+    def _jacobian(self, V):
+        r, c = self._r, self._c
+        Ibus = self.Ybus * V
+        Vnorm = V / abs(V)
+        yV = self._y * V[c]
+        dS_dVm = V[r] * numpy.conj(self._y * Vnorm[c])
+        dS_dVm[self._diag] += numpy.conj(Ibus[self._diag_bus]) * Vnorm[self._diag_bus]
+        dS_dVa = -yV
+        dS_dVa[self._diag] += Ibus[self._diag_bus]
+        dS_dVa = 1j * V[r] * numpy.conj(dS_dVa)
+        data = numpy.concatenate((dS_dVa.real, dS_dVm.real, dS_dVa.imag, dS_dVm.imag))
+        return csc_matrix((data[self._jac_data_src], self._jac_indices, self._jac_indptr),
+                          shape=(self._jac_size, self._jac_size))
+
+    def _solve(self, J, F):
+        if self._perm_c is None:
+            # First factorization: let SuperLU pick the column ordering,
+            #   then lay the Jacobian out in that order from now on
+            lu = splu(J)
+            self._perm_c = lu.perm_c
+            self._order_jacobian(self._perm_c)
+            return lu.solve(F)
+        return splu(J, permc_spec="NATURAL").solve(F)[self._perm_c]
+
+    def _mismatch(self, V, Sbus):
+        mis = V * numpy.conj(self.Ybus * V) - Sbus
+        return numpy.r_[mis[self.pv].real, mis[self.pq].real, mis[self.pq].imag]
+
+    def _newton(self, Sbus, V0):
+        V = V0
+        Va = numpy.angle(V)
+        Vm = abs(V)
+        npv = len(self.pv)
+        npq = len(self.pq)
+
+        F = self._mismatch(V, Sbus)
+        i = 0
+        converged = numpy.linalg.norm(F, numpy.inf) < self.tol
+        while not converged and i < self.max_it:
+            i = i + 1
+            dx = -self._solve(self._jacobian(V), F)
+            Va[self.pv] += dx[:npv]
+            Va[self.pq] += dx[npv:npv + npq]
+            Vm[self.pq] += dx[npv + npq:]
+            V = Vm * numpy.exp(1j * Va)
+            Vm = abs(V)
+            Va = numpy.angle(V)
+
+            F = self._mismatch(V, Sbus)
+            converged = numpy.linalg.norm(F, numpy.inf) < self.tol
+
+        return V, converged, i
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Preallocated recorder for the per-step results of the Transmission
+federate. The number of power flow (or OPF) steps is known before the
+co-simulation starts, so the whole results array is allocated up front
+and every step just fills in the next row, instead of copying everything
+recorded so far with numpy.vstack. For long runs at fine resolution the
+array can be backed by a .npy file on disk (memory-mapped) so the results
+don't need to fit in memory.
+"""
+import numpy
+
+
+class Recorder:
+    '''
+    :param rows: Maximum number of steps to record
+    :param columns: Number of values recorded at each step
+    :param filename: If given, the results are kept in this .npy file
+        (memory-mapped) rather than in memory
+    '''
+    def __init__(self, rows, columns, filename=None):
+        shape = (rows, columns)
+        if filename is None:
+            self._values = numpy.empty(shape)
+        else:
+            self._values = numpy.lib.format.open_memmap(
+                filename, mode="w+", dtype=float, shape=shape
+            )
+        self._time = numpy.empty(rows)
+        self.count = 0
+
+    def append(self, t, values):
+        '''
+        Records the values for one step.
+
+        :param t: Time of the step
+        :param values: Sequence of "columns" values
+        :return: (none)
+        '''
+        if self.count == len(self._time):
+            raise IndexError("Recorder is full ({} rows)".format(self.count))
+        self._time[self.count] = t
+        self._values[self.count] = values
+        self.count += 1
+
+    @property
+    def time(self):
+        '''
+        :return: Times of the recorded steps
+        '''
+        return self._time[: self.count]
+
+    @property
+    def values(self):
+        '''
+        :return: Recorded values with one row per step (a view, not a copy)
+        '''
+        return self._values[: self.count]
+
+    def flush(self):
+        '''
+        Writes any recorded values held in memory out to the .npy file.
+
+        :return: (none)
+        '''
+        if isinstance(self._values, numpy.memmap):
+            self._values.flush()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 10/18/2026
+
+Live plotting without holding up the co-simulation. Redrawing matplotlib
+figures (and plt.pause()) inside the time loop blocks the federate, and
+so the whole federation, on the GUI. Instead the federate sends each
+time step's results to a separate viewer process through a queue and
+moves on; the viewer draws whatever has arrived at its own frame rate.
+
+Sending never waits: the samples are pickled and passed on by the
+queue's background thread, and if the viewer falls so far behind that
+the queue fills up, samples are dropped (and counted) rather than
+stalling the federate.
+"""
+import multiprocessing
+import queue
+import time
+
+
+def _viewer(samples, view, args, fps):
+    import matplotlib.pyplot as plt
+
+    v = view(*args)
+    plt.show(block=False)
+    frame = 1.0 / fps
+    running = True
+    while running:
+        next_frame = time.monotonic() + frame
+        updated = False
+        while True:
+            timeout = next_frame - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                sample = samples.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if sample is None:
+                running = False
+                break
+            v.update(sample)
+            updated = True
+        if updated:
+            v.draw()
+        plt.pause(0.001)
+
+
+class Telemetry:
+    '''
+    :param view: Class that does the plotting; it is instantiated in the
+        viewer process as view(*args) and must have an update(sample)
+        method, called for every sample, and a draw() method, called at
+        most once per frame. It must be importable by the viewer process
+        (e.g. defined at the top level of the federate's script).
+    :param args: Arguments for view
+    :param fps: Maximum number of redraws per second
+    :param maxsize: Number of samples the queue holds before new ones
+        are dropped
+    '''
+    def __init__(self, view, *args, fps=5, maxsize=10000):
+        self._samples = multiprocessing.Queue(maxsize)
+        self._process = multiprocessing.Process(
+            target=_viewer, args=(self._samples, view, args, fps), daemon=True
+        )
+        self._process.start()
+        self.dropped = 0
+
+    def send(self, sample):
+        '''
+        Passes a sample to the viewer without waiting on it.
+
+        :param sample: Any picklable object understood by view.update()
+        :return: (none)
+        '''
+        try:
+            self._samples.put_nowait(sample)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=10):
+        '''
+        Lets the viewer draw the last samples and waits for it to exit.
+
+        :param timeout: Maximum time to wait for the viewer (seconds)
+        :return: (none)
+        '''
+        self._samples.put(None, timeout=timeout)
+        self._samples.close()
+        self._process.join(timeout)